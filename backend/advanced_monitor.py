@@ -1,7 +1,15 @@
-import requests
+from http_pool import http_pool
+from dns_cache import dns_cache
+import os
 import ssl
+import time
 import socket
+import bisect
+import hashlib
 import logging
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from urllib.parse import urlparse
 
@@ -9,54 +17,353 @@ logger = logging.getLogger(__name__)
 
 class AdvancedMonitor:
     def __init__(self):
-        pass
+        # Re-handshake cached certificates on a slow schedule, faster near expiry
+        self.cert_refresh_interval = float(os.environ.get('CERT_REFRESH_INTERVAL', '21600'))
+        self.cert_near_expiry_days = float(os.environ.get('CERT_NEAR_EXPIRY_DAYS', '14'))
+        self.cert_near_expiry_refresh = float(os.environ.get('CERT_NEAR_EXPIRY_REFRESH', '3600'))
+        self._certs = {}  # hostname -> cache entry
+        self._expiry_index = []  # sorted (not_after, hostname)
+        self._cert_lock = threading.Lock()
+        
+        # Checks for one target run concurrently under a single overall deadline
+        self.check_deadline = float(os.environ.get('ADVANCED_CHECK_DEADLINE', '8'))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get('ADVANCED_CHECK_WORKERS', '16')),
+            thread_name_prefix='advanced-check'
+        )
+        
+        # 'parallel' runs each check over its own connection; 'combined' inspects
+        # a target over one resolved connection
+        self.inspect_mode = os.environ.get('ADVANCED_INSPECT_MODE', 'parallel')
+        
+        # Fleet inspections are cached and refreshed in the background
+        self.fleet_ttl = float(os.environ.get('ADVANCED_FLEET_TTL', '300'))
+        self.fleet_refresh_interval = float(os.environ.get('ADVANCED_FLEET_REFRESH_INTERVAL', '60'))
+        self.fleet_concurrency = int(os.environ.get('ADVANCED_FLEET_CONCURRENCY', '8'))
+        # Fleet checks get their own workers (four per inspected URL) so a refresh
+        # never queues ahead of interactive /advanced-metrics requests
+        self._fleet_executor = ThreadPoolExecutor(
+            max_workers=self.fleet_concurrency * 4,
+            thread_name_prefix='fleet-check'
+        )
+        self._fleet = {}  # url -> (fetched_at, status)
+        self._fleet_lock = threading.Lock()
+        self._fleet_thread = None
+        self.last_fleet_refresh = None
     
-    def get_comprehensive_status(self, url):
-        """Get comprehensive monitoring status"""
+    def get_comprehensive_status(self, url, deadline=None, mode=None, executor=None):
+        """Get comprehensive monitoring status.
+        
+        The SSL, DNS, port and header checks run concurrently (on executor,
+        by default the interactive pool). Checks still running at the
+        deadline are reported as pending and the status is marked partial.
+        """
+        deadline = deadline or self.check_deadline
+        if (mode or self.inspect_mode) == 'combined':
+            return self.inspect_combined(url, deadline)
+        
         try:
             parsed_url = urlparse(url)
             hostname = parsed_url.hostname or url
             
-            status = {
-                'url': url,
-                'hostname': hostname,
-                'ssl_info': self.check_ssl_certificate(hostname),
-                'dns_resolution': self.check_dns_resolution(hostname),
-                'port_status': self.check_port_status(hostname, 443 if parsed_url.scheme == 'https' else 80),
-                'response_headers': self.get_response_headers(url),
-                'timestamp': datetime.now().isoformat()
+            checks = {
+                'ssl_info': (self.check_ssl_certificate, hostname),
+                'dns_resolution': (self.check_dns_resolution, hostname),
+                'port_status': (self.check_port_status, hostname, parsed_url.port or (443 if parsed_url.scheme == 'https' else 80)),
+                'response_headers': (self.get_response_headers, url)
             }
+            futures = {name: (executor or self._executor).submit(*call) for name, call in checks.items()}
+            done, _ = wait(futures.values(), timeout=deadline)
             
+            status = {'url': url, 'hostname': hostname}
+            pending_checks = []
+            for name, future in futures.items():
+                if future in done:
+                    try:
+                        status[name] = future.result()
+                    except Exception as e:
+                        status[name] = {'error': str(e)}
+                else:
+                    pending_checks.append(name)
+                    status[name] = {'pending': True, 'error': f'No result within {deadline}s'}
+            
+            status['partial'] = bool(pending_checks)
+            status['pending_checks'] = pending_checks
+            status['timestamp'] = datetime.now().isoformat()
             return status
             
         except Exception as e:
             logger.error(f"Advanced monitoring failed: {e}")
             return {'error': str(e), 'timestamp': datetime.now().isoformat()}
     
-    def check_ssl_certificate(self, hostname):
-        """Check SSL certificate status"""
+    def inspect_combined(self, url, deadline=None):
+        """Inspect a target over a single connection.
+        
+        Resolves once, connects once, takes the certificate from the TLS
+        handshake and sends HEAD over the same socket. Redirects are not
+        followed. Steps not reached before the deadline are reported as
+        pending.
+        """
+        parsed_url = urlparse(url)
+        hostname = parsed_url.hostname or url
+        https = parsed_url.scheme == 'https'
+        port = parsed_url.port or (443 if https else 80)
+        deadline = deadline or self.check_deadline
+        give_up_at = time.monotonic() + deadline
+        
+        status = {'url': url, 'hostname': hostname, 'mode': 'combined'}
+        timings = {}
+        pending_checks = ['dns_resolution', 'port_status', 'ssl_info', 'response_headers']
+        
+        def remaining():
+            left = give_up_at - time.monotonic()
+            if left <= 0:
+                raise socket.timeout(f'No result within {deadline}s')
+            return left
+        
+        def finish(skip_reason=None):
+            # Steps after a failed one are skipped; steps cut off by the deadline are pending
+            for name in pending_checks:
+                if skip_reason:
+                    status[name] = {'skipped': True, 'error': skip_reason}
+                else:
+                    status[name] = {'pending': True, 'error': f'No result within {deadline}s'}
+            status['partial'] = bool(pending_checks) and not skip_reason
+            status['pending_checks'] = [] if skip_reason else pending_checks
+            status['timings'] = timings
+            status['timestamp'] = datetime.now().isoformat()
+            return status
+        
+        def done(name, result, started):
+            pending_checks.remove(name)
+            status[name] = result
+            timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        
+        started = time.perf_counter()
+        try:
+            addresses = dns_cache.resolve(hostname)
+        except Exception as e:
+            done('dns_resolution', {'resolved': False, 'error': str(e)}, started)
+            return finish(f'DNS resolution failed: {e}')
+        done('dns_resolution', {
+            'resolved': True,
+            'ip': addresses[0],
+            'addresses': addresses,
+            'ttl_remaining': dns_cache.ttl_remaining(hostname)
+        }, started)
+        
+        started = time.perf_counter()
+        sock, error = None, None
+        for address in addresses:
+            try:
+                sock = socket.create_connection((address, port), timeout=remaining())
+                break
+            except OSError as e:
+                error = e
+        if sock is None:
+            if isinstance(error, socket.timeout) or time.monotonic() >= give_up_at:
+                return finish()
+            done('port_status', {'open': False, 'port': port, 'error': str(error)}, started)
+            return finish(f'Connection failed: {error}')
+        done('port_status', {'open': True, 'port': port, 'ip': sock.getpeername()[0]}, started)
+        
+        try:
+            if https:
+                started = time.perf_counter()
+                try:
+                    sock.settimeout(remaining())
+                    sock = ssl.create_default_context().wrap_socket(sock, server_hostname=hostname)
+                except socket.timeout:
+                    return finish()
+                except Exception as e:
+                    done('ssl_info', {'valid': False, 'error': str(e)}, started)
+                    return finish(f'TLS handshake failed: {e}')
+                entry = self._store_certificate(hostname, sock.getpeercert(), sock.getpeercert(binary_form=True))
+                done('ssl_info', self._cert_view(entry, cached=False), started)
+            else:
+                pending_checks.remove('ssl_info')
+                status['ssl_info'] = {'valid': False, 'error': 'Not an HTTPS URL'}
+            
+            started = time.perf_counter()
+            try:
+                sock.settimeout(remaining())
+                conn = http.client.HTTPConnection(hostname, port)
+                conn.sock = sock
+                path = (parsed_url.path or '/') + (f'?{parsed_url.query}' if parsed_url.query else '')
+                # Same Host header a normal client sends: no port when it is the scheme default
+                host = f'[{hostname}]' if ':' in hostname else hostname
+                if port != (443 if parsed_url.scheme == 'https' else 80):
+                    host = f'{host}:{port}'
+                conn.request('HEAD', path, headers={'Host': host, 'Connection': 'close'})
+                response = conn.getresponse()
+                response.read()
+            except socket.timeout:
+                return finish()
+            except Exception as e:
+                done('response_headers', {'error': str(e)}, started)
+                return finish()
+            done('response_headers', {
+                'status_code': response.status,
+                'headers': dict(response.getheaders()),
+                'final_url': url
+            }, started)
+            return finish()
+        finally:
+            sock.close()
+    
+    def inspect_many(self, urls, mode=None):
+        """Inspect many URLs concurrently, at most fleet_concurrency at a time"""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        
+        # A separate pool: parallel-mode inspections wait on their check futures
+        with ThreadPoolExecutor(max_workers=min(self.fleet_concurrency, len(urls))) as pool:
+            return dict(zip(urls, pool.map(
+                lambda url: self.get_comprehensive_status(url, mode=mode, executor=self._fleet_executor), urls
+            )))
+    
+    def refresh_fleet(self, urls, force=False):
+        """Re-inspect URLs whose cached status is older than fleet_ttl"""
+        urls = list(urls)
+        now = time.monotonic()
+        with self._fleet_lock:
+            # Forget URLs that are no longer monitored
+            for url in set(self._fleet) - set(urls):
+                del self._fleet[url]
+            due = [
+                url for url in urls
+                if force or url not in self._fleet or now - self._fleet[url][0] >= self.fleet_ttl
+            ]
+        
+        results = self.inspect_many(due)
+        fetched_at = time.monotonic()
+        with self._fleet_lock:
+            for url, status in results.items():
+                if not status.get('partial'):
+                    self._fleet[url] = (fetched_at, status)
+                elif url not in self._fleet:
+                    # Shown until something better arrives, but retried on the next refresh
+                    self._fleet[url] = (fetched_at - self.fleet_ttl, status)
+            self.last_fleet_refresh = datetime.now().isoformat()
+        return len(results)
+    
+    def get_fleet_status(self, urls=None):
+        """Get cached inspections (no network access), with their age"""
+        now = time.monotonic()
+        with self._fleet_lock:
+            entries = dict(self._fleet)
+        
+        fleet = []
+        for url in (entries if urls is None else urls):
+            if url not in entries:
+                fleet.append({'url': url, 'pending': True})
+                continue
+            fetched_at, status = entries[url]
+            age = now - fetched_at
+            fleet.append(dict(status, url=url, age=round(age, 1), stale=age >= self.fleet_ttl))
+        return fleet
+    
+    def start_fleet_refresh(self, get_urls):
+        """Start refreshing the fleet cache in the background; get_urls returns the URLs to inspect"""
+        if self._fleet_thread:
+            return
+        
+        def refresh_loop():
+            while True:
+                try:
+                    refreshed = self.refresh_fleet(get_urls())
+                    if refreshed:
+                        logger.info(f"Refreshed advanced inspection of {refreshed} URLs")
+                except Exception as e:
+                    logger.error(f"Fleet inspection refresh failed: {e}")
+                time.sleep(self.fleet_refresh_interval)
+        
+        self._fleet_thread = threading.Thread(target=refresh_loop, daemon=True)
+        self._fleet_thread.start()
+    
+    def _cert_refresh_due(self, entry):
+        """Check whether a cached certificate should be fetched again"""
+        age = time.monotonic() - entry['fetched_at']
+        if entry['not_after'] - time.time() < self.cert_near_expiry_days * 86400:
+            return age > self.cert_near_expiry_refresh
+        return age > self.cert_refresh_interval
+    
+    def _cert_view(self, entry, cached):
+        """Certificate info as returned to callers"""
+        return dict(
+            entry['info'],
+            days_remaining=round((entry['not_after'] - time.time()) / 86400, 1),
+            cached=cached
+        )
+    
+    def _store_certificate(self, hostname, cert, der):
+        """Cache a parsed certificate and index it by expiry"""
+        info = {
+            'valid': True,
+            'issuer': dict(x[0] for x in cert['issuer']),
+            'subject': dict(x[0] for x in cert['subject']),
+            'expires': cert['notAfter'],
+            'version': cert['version'],
+            'fingerprint_sha256': hashlib.sha256(der).hexdigest()
+        }
+        entry = {
+            'info': info,
+            'not_after': ssl.cert_time_to_seconds(cert['notAfter']),
+            'fetched_at': time.monotonic()
+        }
+        
+        with self._cert_lock:
+            previous = self._certs.get(hostname)
+            if previous:
+                index = bisect.bisect_left(self._expiry_index, (previous['not_after'], hostname))
+                if index < len(self._expiry_index) and self._expiry_index[index] == (previous['not_after'], hostname):
+                    del self._expiry_index[index]
+            self._certs[hostname] = entry
+            bisect.insort(self._expiry_index, (entry['not_after'], hostname))
+        return entry
+    
+    def check_ssl_certificate(self, hostname, force=False):
+        """Check SSL certificate status, reusing the cached certificate until a refresh is due"""
+        with self._cert_lock:
+            entry = self._certs.get(hostname)
+        if entry and not force and not self._cert_refresh_due(entry):
+            return self._cert_view(entry, cached=True)
+        
         try:
             context = ssl.create_default_context()
             with socket.create_connection((hostname, 443), timeout=10) as sock:
                 with context.wrap_socket(sock, server_hostname=hostname) as ssock:
                     cert = ssock.getpeercert()
-                    
-                    return {
-                        'valid': True,
-                        'issuer': dict(x[0] for x in cert['issuer']),
-                        'subject': dict(x[0] for x in cert['subject']),
-                        'expires': cert['notAfter'],
-                        'version': cert['version']
-                    }
+                    der = ssock.getpeercert(binary_form=True)
+            return self._cert_view(self._store_certificate(hostname, cert, der), cached=False)
         except Exception as e:
             return {'valid': False, 'error': str(e)}
     
+    def get_expiring_certificates(self, days=30, hostnames=None):
+        """List cached certificates expiring within `days`, soonest first (no network access)"""
+        cutoff = time.time() + days * 86400
+        with self._cert_lock:
+            end = bisect.bisect_right(self._expiry_index, (cutoff, chr(0x10FFFF)))
+            expiring = self._expiry_index[:end]
+            entries = {hostname: self._certs[hostname] for _, hostname in expiring}
+        
+        return [
+            dict(self._cert_view(entries[hostname], cached=True), hostname=hostname)
+            for _, hostname in expiring
+            if hostnames is None or hostname in hostnames
+        ]
+    
     def check_dns_resolution(self, hostname):
         """Check DNS resolution"""
         try:
-            import socket
-            ip = socket.gethostbyname(hostname)
-            return {'resolved': True, 'ip': ip}
+            addresses = dns_cache.resolve(hostname)
+            return {
+                'resolved': True,
+                'ip': addresses[0],
+                'addresses': addresses,
+                'ttl_remaining': dns_cache.ttl_remaining(hostname)
+            }
         except Exception as e:
             return {'resolved': False, 'error': str(e)}
     
@@ -74,7 +381,7 @@ class AdvancedMonitor:
     def get_response_headers(self, url):
         """Get HTTP response headers"""
         try:
-            response = requests.head(url, timeout=10, allow_redirects=True)
+            response = http_pool.head(url, timeout=10, allow_redirects=True)
             return {
                 'status_code': response.status_code,
                 'headers': dict(response.headers),
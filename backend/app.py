@@ -1,6 +1,6 @@
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity, jwt_required
 from flask_socketio import SocketIO, emit
 import requests
 import os
@@ -8,12 +8,36 @@ import logging
 import json
 import time
 from datetime import datetime, timedelta
+from urllib.parse import urlparse
 import threading
 import psutil
 from werkzeug.security import check_password_hash
 import gc
 
 # Import modules with error handling
+try:
+    from http_pool import http_pool
+except ImportError:
+    class DummyHTTPPool:
+        def get(self, url, **kwargs): return requests.get(url, **kwargs)
+        def head(self, url, **kwargs): return requests.head(url, **kwargs)
+    http_pool = DummyHTTPPool()
+
+try:
+    from task_queue import task_queue
+except ImportError:
+    class DummyTaskQueue:
+        def submit(self, queue, func, *args, key=None, **kwargs):
+            threading.Thread(target=func, args=args, kwargs=kwargs, daemon=True).start()
+            return True
+        def submit_later(self, delay, queue, func, *args, key=None, **kwargs):
+            timer = threading.Timer(delay, func, args=args, kwargs=kwargs)
+            timer.daemon = True
+            timer.start()
+            return True
+        def get_stats(self): return {'workers': 0, 'queues': {}}
+    task_queue = DummyTaskQueue()
+
 try:
     from deployment_client import create_deployment_client
 except ImportError:
@@ -70,20 +94,33 @@ try:
     from advanced_monitor import advanced_monitor
 except ImportError:
     class DummyAdvancedMonitor:
-        def get_comprehensive_status(self, url): return {}
+        def get_comprehensive_status(self, url, deadline=None, mode=None): return {}
+        def get_expiring_certificates(self, days=30, hostnames=None): return []
+        def get_fleet_status(self, urls=None): return []
+        def start_fleet_refresh(self, get_urls): pass
     advanced_monitor = DummyAdvancedMonitor()
 
 try:
-    from websocket_handlers import add_real_time_log, calculate_health_score, setup_websocket_handlers
+    from metric_stream import metric_stream, LEGACY_ROOM
 except ImportError:
+    class DummyMetricStream:
+        def publish(self, socketio, fields, logs=()): return None
+    metric_stream = DummyMetricStream()
+    LEGACY_ROOM = None  # Broadcast legacy events to everyone
+
+try:
+    from websocket_handlers import add_real_time_log, calculate_health_score, setup_websocket_handlers, user_room
+except ImportError:
+    def user_room(user_id):
+        return f"user:{user_id}"
+    
     def add_real_time_log(socketio, metrics_data, message, level='info'):
         log_entry = {
             'timestamp': datetime.now().isoformat(),
             'level': level,
             'message': message
         }
-        metrics_data['real_time_logs'].append(log_entry)
-        metrics_data['real_time_logs'] = metrics_data['real_time_logs'][-100:]
+        metrics_data.append('real_time_logs', log_entry, limit=100)
         socketio.emit('new_log', log_entry)
     
     def calculate_health_score(metrics_data):
@@ -95,27 +132,136 @@ except ImportError:
         if metrics_data['latency'] > 2000: score -= 10
         return max(0, score)
     
-    def setup_websocket_handlers(socketio, metrics_data):
+    def setup_websocket_handlers(socketio, metrics_data, deployments=None):
         @socketio.on('connect')
         def handle_connect():
-            metrics_data['active_users'] += 1
+            metrics_data.apply('active_users', lambda users: users + 1)
             emit('connected', {'message': 'Connected to real-time monitoring'})
         
         @socketio.on('disconnect')
         def handle_disconnect():
-            metrics_data['active_users'] = max(0, metrics_data['active_users'] - 1)
+            metrics_data.apply('active_users', lambda users: max(0, users - 1))
 
 try:
     from url_monitor import url_monitor
 except ImportError:
     class DummyURLMonitor:
-        def add_url(self, url): return {'success': True, 'message': 'URL added'}
-        def get_monitored_urls(self): return []
-        def check_url(self, url): return {'is_online': True, 'status_code': 200, 'response_time': 100}
-        def remove_url(self, url): return {'success': True, 'message': 'URL removed'}
-        def check_all_urls(self): return []
+        def add_url(self, url, **kwargs): return {'success': True, 'message': 'URL added'}
+        def get_monitored_urls(self, user_id=None): return []
+        def get_offline_urls(self, user_id=None): return []
+        def check_url(self, url, **kwargs): return {'is_online': True, 'status_code': 200, 'response_time': 100}
+        def get_url(self, url, user_id=None): return None
+        def claim_unowned(self, user_id): return 0
+        def remove_url(self, url, user_id=None): return {'success': True, 'message': 'URL removed'}
+        def check_all_urls(self, user_id=None): return []
+        def heal_url(self, url): return url, self.check_url(url), []
+        def heal_urls(self, urls): return [(url,) + self.heal_url(url) for url in urls]
     url_monitor = DummyURLMonitor()
 
+try:
+    from dns_cache import dns_cache
+except ImportError:
+    class DummyDNSCache:
+        def invalidate(self, hostname=None): pass
+        def get_stats(self): return {'entries': 0, 'hits': 0, 'misses': 0}
+    dns_cache = DummyDNSCache()
+
+try:
+    from url_scheduler import url_scheduler, AdaptiveCadence
+except ImportError:
+    AdaptiveCadence = None
+    class DummyURLScheduler:
+        on_result = None
+        def start(self): pass
+        def get_stats(self): return {'targets': 0}
+    url_scheduler = DummyURLScheduler()
+
+try:
+    from system_sampler import system_sampler
+except ImportError:
+    class DummySystemSampler:
+        def start(self): pass
+        def get_collector_stats(self): return []
+        def get_snapshot(self):
+            memory = psutil.virtual_memory()
+            return {
+                'cpu': psutil.cpu_percent(interval=None),
+                'memory': memory.percent,
+                'memory_total': memory.total,
+                'disk': psutil.disk_usage('/').percent,
+                'network_speed': 0,
+                'active_connections': 0,
+                'temperature': 0,
+                'boot_time': psutil.boot_time(),
+                'cpu_count': psutil.cpu_count(),
+                'sampled_at': time.time()
+            }
+    system_sampler = DummySystemSampler()
+
+try:
+    from metrics_state import MetricsState
+except ImportError:
+    class MetricsState(dict):
+        """Unsynchronised fallback with the same interface"""
+        def snapshot(self): return self
+        def apply(self, key, func):
+            self[key] = func(self.get(key))
+            return self
+        def extend(self, key, items, limit=None):
+            return self.apply(key, lambda current: (list(current or []) + list(items))[-limit:] if limit else list(current or []) + list(items))
+        def append(self, key, item, limit=None): return self.extend(key, (item,), limit)
+        def reset(self, values):
+            self.clear()
+            self.update(values)
+            return self
+
+try:
+    from metrics_history import metrics_history
+except ImportError:
+    class DummyMetricsHistory:
+        def __len__(self): return 0
+        def append(self, *args, **kwargs): pass
+        def aggregate(self, window): return {'samples': 0, 'uptime_percentage': None, 'incidents': 0}
+        def aggregates(self): return {}
+        def tail(self, n): return []
+    metrics_history = DummyMetricsHistory()
+
+try:
+    from response_cache import response_cache
+except ImportError:
+    class DummyResponseCache:
+        """Caches nothing; every request renders its payload"""
+        def put(self, key, body):
+            body = body.encode('utf-8') if isinstance(body, str) else body
+            return body, None
+        def get(self, key): return None
+        def invalidate(self, key=None): pass
+    response_cache = DummyResponseCache()
+
+try:
+    from deployment_registry import deployment_registry
+except ImportError:
+    class DummyDeployment:
+        def __init__(self, url):
+            self.name = urlparse(url).hostname or url
+            self.url = url
+            self.history = metrics_history
+            self.room = f"deployment:{self.name}"
+            self.next_probe_at = 0
+            self.last_probe = None
+            self.state = {'name': self.name, 'url': url, 'status': 'Unknown', 'is_online': True, 'was_down': False,
+                          'latency': 0, 'uptime_percentage': 100, 'health_score': 100, 'probe_timings': {}, 'last_checked': None}
+        def to_dict(self): return dict(self.state)
+    class DummyDeploymentRegistry:
+        def __init__(self):
+            self.primary = DummyDeployment(os.environ.get('DEPLOYMENT_URL', 'https://google.com'))
+        def get(self, name): return self.primary if name == self.primary.name else None
+        def all(self): return [self.primary]
+        def urls(self): return [self.primary.url]
+        def check_all(self, check): return [check(self.primary)]
+        def summary(self): return [self.primary.to_dict()]
+    deployment_registry = DummyDeploymentRegistry()
+
 try:
     from ai_predictor import ai_predictor
 except ImportError:
@@ -171,29 +317,37 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Configuration
-DEPLOYMENT_URL = os.environ.get('DEPLOYMENT_URL', 'https://google.com')
+DEPLOYMENT_URL = deployment_registry.primary.url
 REQUEST_TIMEOUT = 10
+MONITOR_INTERVAL = 3
+# Minimum seconds between on-demand probes from /api/real-metrics/probe (shared by all clients)
+FRESH_PROBE_INTERVAL = float(os.environ.get('FRESH_PROBE_INTERVAL', '10'))
+
+# Adaptive cadence backs the deployment probe off while it is stable
+# (capped, since a new outage goes unnoticed until the next probe)
+DEPLOYMENT_MAX_PROBE_INTERVAL = float(os.environ.get('DEPLOYMENT_MAX_PROBE_INTERVAL', '10'))
+deployment_cadence = None
+if AdaptiveCadence and os.environ.get('PROBE_CADENCE', 'fixed') == 'adaptive':
+    deployment_cadence = AdaptiveCadence(min_interval=MONITOR_INTERVAL, max_interval=DEPLOYMENT_MAX_PROBE_INTERVAL)
 
 # Initialize with real system data immediately
 def get_initial_metrics():
-    cpu = psutil.cpu_percent(interval=1)
-    memory = psutil.virtual_memory()
-    disk = psutil.disk_usage('/')
+    system = system_sampler.get_snapshot()
     return {
         'status': 'Online',
         'uptime_percentage': 100,
         'latency': 0,
-        'cpu_usage': round(max(cpu, 0.1), 2),
-        'memory_usage': round(memory.percent, 2),
-        'disk_usage': round(disk.percent, 2),
+        'cpu_usage': round(max(system['cpu'], 0.1), 2),
+        'memory_usage': round(system['memory'], 2),
+        'disk_usage': round(system['disk'], 2),
         'network_speed': 0,
         'active_connections': 0,
         'temperature': 0,
         'last_checked': datetime.now().isoformat(),
         'logs_summary': {'errors': 0, 'warnings': 0},
-        'uptime_history': [],
         'alerts': [],
         'current_balance': 25.50,
+        'runway_days': None,
         'balance_history': [],
         'last_notification_sent': None,
         'server_was_down': False,
@@ -202,8 +356,8 @@ def get_initial_metrics():
         'deployment_health_score': 100
     }
 
-# Global state with real initial data
-metrics_data = get_initial_metrics()
+# Global state with real initial data; replaced snapshot by snapshot, never rebound
+metrics_data = MetricsState(get_initial_metrics())
 
 ALERT_THRESHOLDS = {
     'cpu': 80,
@@ -220,212 +374,191 @@ def init_db():
     deposit_monitor.init_db()
 
 def check_alerts():
-    global metrics_data
+    metrics = metrics_data.snapshot()
     alerts = []
     
-    if metrics_data['cpu_usage'] > ALERT_THRESHOLDS['cpu']:
+    if metrics['cpu_usage'] > ALERT_THRESHOLDS['cpu']:
         alerts.append({
             'type': 'cpu',
-            'message': f"High CPU usage: {metrics_data['cpu_usage']}%",
+            'message': f"High CPU usage: {metrics['cpu_usage']}%",
             'severity': 'warning',
             'timestamp': datetime.now().isoformat()
         })
     
-    if metrics_data['memory_usage'] > ALERT_THRESHOLDS['memory']:
+    if metrics['memory_usage'] > ALERT_THRESHOLDS['memory']:
         alerts.append({
             'type': 'memory',
-            'message': f"High memory usage: {metrics_data['memory_usage']}%",
+            'message': f"High memory usage: {metrics['memory_usage']}%",
             'severity': 'critical',
             'timestamp': datetime.now().isoformat()
         })
     
-    if metrics_data['disk_usage'] > ALERT_THRESHOLDS['disk']:
+    if metrics['disk_usage'] > ALERT_THRESHOLDS['disk']:
         alerts.append({
             'type': 'disk',
-            'message': f"High disk usage: {metrics_data['disk_usage']}%",
+            'message': f"High disk usage: {metrics['disk_usage']}%",
             'severity': 'critical',
             'timestamp': datetime.now().isoformat()
         })
     
-    if metrics_data['latency'] > ALERT_THRESHOLDS['latency']:
+    if metrics['latency'] > ALERT_THRESHOLDS['latency']:
         alerts.append({
             'type': 'latency',
-            'message': f"High latency: {metrics_data['latency']}ms",
+            'message': f"High latency: {metrics['latency']}ms",
             'severity': 'warning',
             'timestamp': datetime.now().isoformat()
         })
     
     if alerts:
-        metrics_data['alerts'].extend(alerts)
-        metrics_data['alerts'] = metrics_data['alerts'][-50:]  # Keep last 50 alerts
+        metrics_data.extend('alerts', alerts, limit=50)  # Keep last 50 alerts
 
-def check_deployment_health():
-    global metrics_data
-    
-    # Get REAL system metrics with proper intervals
-    cpu_usage = psutil.cpu_percent(interval=0.5)  # Shorter interval for faster response
-    if cpu_usage == 0:  # If still 0, force a reading
-        cpu_usage = psutil.cpu_percent(interval=1)
+def check_deployment(deployment, system):
+    """Probe one deployment and update its state, history and health score"""
+    state = dict(deployment.state)
     
-    memory = psutil.virtual_memory()
-    disk = psutil.disk_usage('/')
-    
-    try:
-        connections = len([conn for conn in psutil.net_connections() if conn.status == 'ESTABLISHED'])
-    except:
-        connections = 0
-    
-    # Try URL check with real latency measurement
-    try:
-        start_time = time.time()
-        response = requests.get(DEPLOYMENT_URL, timeout=5)
-        latency = (time.time() - start_time) * 1000
-        is_online = response.status_code == 200
-    except Exception as e:
+    # Try URL check with real latency measurement (body-less probe), unless the
+    # adaptive cadence says the last result is still fresh enough
+    now = time.monotonic()
+    probed = deployment_cadence is None or deployment.last_probe is None or now >= deployment.next_probe_at
+    if probed:
+        probe = url_monitor.check_url(deployment.url, timeout=5)
+        if deployment_cadence:
+            interval = deployment_cadence.next_interval(deployment.url, probe, MONITOR_INTERVAL)
+            deployment.next_probe_at = now + interval
+        deployment.last_probe = probe
+    else:
+        probe = deployment.last_probe
+    is_online = probe['is_online']
+    if 'error' in probe:
         latency = 0  # Set to 0 when failed
-        is_online = False
-        logger.warning(f"URL check failed: {e}")
+        logger.warning(f"URL check failed for {deployment.name}: {probe['error']}")
+    else:
+        latency = probe['response_time']
     
     # Check for server state changes and send notifications with intelligent alerting
-    if not is_online and not metrics_data['server_was_down']:
+    if not is_online and not state['was_down']:
         # Server just went down - use intelligent alerting
-        if intelligent_alerting.should_send_alert('server_down', f'Server {DEPLOYMENT_URL} is down', 'critical'):
-            notification_service.notify_server_down(DEPLOYMENT_URL)
-            log_action('alert', 'sent', 'Server down notification sent')
-        metrics_data['server_was_down'] = True
-    elif is_online and metrics_data['server_was_down']:
+        if intelligent_alerting.should_send_alert('server_down', f'Server {deployment.url} is down', 'critical'):
+            notification_service.notify_server_down(deployment.url)
+            log_action('alert', 'sent', f'Server down notification sent ({deployment.name})')
+        state['was_down'] = True
+    elif is_online and state['was_down']:
         # Server recovered
-        if intelligent_alerting.should_send_alert('server_recovered', f'Server {DEPLOYMENT_URL} recovered', 'low'):
-            notification_service.notify_server_recovered(DEPLOYMENT_URL)
-            log_action('alert', 'sent', 'Server recovery notification sent')
-        metrics_data['server_was_down'] = False
-        
-        # System metrics already collected above
-        
-    # Real network speed calculation
-    try:
-        net_io = psutil.net_io_counters()
-        current_time = time.time()
-        
-        if hasattr(check_deployment_health, 'last_net_time'):
-            time_delta = current_time - check_deployment_health.last_net_time
-            bytes_delta = (net_io.bytes_sent + net_io.bytes_recv) - check_deployment_health.last_net_bytes
-            network_speed = round((bytes_delta / time_delta) / 1024, 1) if time_delta > 0 else 0
-        else:
-            network_speed = 0
-        
-        check_deployment_health.last_net_time = current_time
-        check_deployment_health.last_net_bytes = net_io.bytes_sent + net_io.bytes_recv
-    except:
-        network_speed = 0
-        
-    # Real temperature (if available)
-    try:
-        temps = psutil.sensors_temperatures()
-        if temps:
-            temp_list = []
-            for name, entries in temps.items():
-                for entry in entries:
-                    if entry.current:
-                        temp_list.append(entry.current)
-            temperature = round(sum(temp_list) / len(temp_list), 1) if temp_list else 0
-        else:
-            temperature = 0
-    except:
-        temperature = 0
-        
-    # Update all metrics with real data
-    metrics_data.update({
+        if intelligent_alerting.should_send_alert('server_recovered', f'Server {deployment.url} recovered', 'low'):
+            notification_service.notify_server_recovered(deployment.url)
+            log_action('alert', 'sent', f'Server recovery notification sent ({deployment.name})')
+        state['was_down'] = False
+    
+    if not is_online:
+        task_queue.submit('healing', enhanced_self_healing.auto_heal, 'service_unresponsive', {'url': deployment.url},
+                          key=('service_unresponsive', deployment.url))
+    
+    # Add to history (real probes only, so reused results don't count twice);
+    # window aggregates are updated incrementally
+    if probed:
+        deployment.history.append(is_online, latency, system['cpu'], system['memory'])
+    uptime_24h = deployment.history.aggregate('24h')['uptime_percentage']
+    
+    state.update({
         'status': 'Online' if is_online else 'Offline',
+        'is_online': is_online,
         'latency': round(latency, 2),
-        'cpu_usage': round(max(cpu_usage, 0.1), 2),  # Ensure minimum 0.1% to show it's working
-        'memory_usage': round(memory.percent, 2),
-        'disk_usage': round(disk.percent, 2),
-        'network_speed': network_speed,
-        'active_connections': connections,
-        'temperature': temperature,
-        'last_checked': datetime.now().isoformat()
+        'uptime_percentage': uptime_24h if uptime_24h is not None else state['uptime_percentage'],
+        'probe_timings': probe.get('timings', {}),
+        'last_checked': probe.get('checked_at') or state['last_checked'] or datetime.now().isoformat()
+    })
+    state['health_score'] = calculate_health_score({
+        'status': state['status'],
+        'latency': state['latency'],
+        'cpu_usage': system['cpu'],
+        'memory_usage': system['memory'],
+        'disk_usage': system['disk']
     })
     
-    # Add metrics to AI predictor
-    ai_predictor.add_metrics(cpu_usage, memory.percent, latency, is_online)
-    
-    # Get failure prediction
-    prediction = ai_predictor.predict_failure_probability()
-    metrics_data['failure_prediction'] = prediction
+    # Swap in the new state so readers never see a half-updated one
+    deployment.state = state
+    return probe
+
+def check_deployment_health():
+    # Latest host metrics from the background sampler (non-blocking)
+    system = system_sampler.get_snapshot()
+    cpu_usage = system['cpu']
+    memory_percent = system['memory']
+    disk_percent = system['disk']
     
-    # Auto-healing based on predictions and current state
-    if prediction['probability'] > 0.7:
-        logger.warning(f"High failure probability detected: {prediction['probability']}")
-        # Trigger proactive healing
-        threading.Thread(target=_proactive_healing, args=(metrics_data,), daemon=True).start()
+    # Probe every deployment concurrently
+    deployment_registry.check_all(lambda deployment: check_deployment(deployment, system))
     
-    # Check for immediate issues requiring healing
-    if cpu_usage > 90:
-        threading.Thread(target=enhanced_self_healing.auto_heal, args=('cpu_overload', {'cpu': cpu_usage}), daemon=True).start()
-    if memory.percent > 95:
-        threading.Thread(target=enhanced_self_healing.auto_heal, args=('memory_pressure', {'memory': memory.percent}), daemon=True).start()
-    if not is_online:
-        threading.Thread(target=enhanced_self_healing.auto_heal, args=('service_unresponsive', {'url': DEPLOYMENT_URL}), daemon=True).start()
+    # The top-level metrics describe the host and the primary deployment
+    primary = deployment_registry.primary.state
+    is_online = primary['is_online']
+    latency = primary['latency']
     
-    # Log real metrics for debugging
-    logger.info(f"Real metrics - CPU: {cpu_usage}%, Memory: {memory.percent}%, Disk: {disk.percent}%")
-        
-    # Add to history
-    metrics_data['uptime_history'].append({
-        'timestamp': datetime.now().isoformat(),
-        'online': is_online,
+    # Everything measured this tick goes into one new snapshot
+    previous = metrics_data.snapshot()
+    tick = {
+        'status': primary['status'],
         'latency': latency,
-        'cpu': cpu_usage,
-        'memory': memory.percent
-    })
-        
-    # Clean old history and calculate uptime
-    cutoff_time = datetime.now() - timedelta(hours=24)
-    metrics_data['uptime_history'] = [
-        h for h in metrics_data['uptime_history'] 
-        if datetime.fromisoformat(h['timestamp']) > cutoff_time
-    ]
+        'cpu_usage': round(max(cpu_usage, 0.1), 2),  # Ensure minimum 0.1% to show it's working
+        'memory_usage': round(memory_percent, 2),
+        'disk_usage': round(disk_percent, 2),
+        'network_speed': system['network_speed'],
+        'active_connections': system['active_connections'],
+        'temperature': system['temperature'],
+        'probe_timings': primary['probe_timings'],
+        'server_was_down': primary['was_down'],
+        'uptime_percentage': primary['uptime_percentage'],
+        'last_checked': datetime.now().isoformat()
+    }
     
-    if metrics_data['uptime_history']:
-        online_count = sum(1 for h in metrics_data['uptime_history'] if h['online'])
-        metrics_data['uptime_percentage'] = round(
-            (online_count / len(metrics_data['uptime_history'])) * 100, 2
-        )
+    # Add metrics to AI predictor
+    ai_predictor.add_metrics(cpu_usage, memory_percent, latency, is_online)
     
-    check_alerts()
+    # Get failure prediction
+    prediction = ai_predictor.predict_failure_probability()
+    tick['failure_prediction'] = prediction
     
-    # Get proactive suggestions
-    suggestions = enhanced_self_healing.suggest_proactive_actions(metrics_data)
-    metrics_data['proactive_suggestions'] = suggestions
+    # Get proactive suggestions and the health score for the new values
+    current = dict(previous, **tick)
+    tick['proactive_suggestions'] = enhanced_self_healing.suggest_proactive_actions(current)
+    tick['deployment_health_score'] = calculate_health_score(current)
     
     # Check balance every 30 seconds for demo, or immediately if never checked
-    if (not metrics_data.get('last_balance_check') or 
-        time.time() - metrics_data.get('last_balance_check', 0) > 30):
+    # (or still zero on the first runs)
+    if (not previous.get('last_balance_check') or 
+        time.time() - previous.get('last_balance_check', 0) > 30 or
+        previous.get('current_balance', 0) == 0):
         try:
             balance = deposit_monitor.check_balance()
             if balance is not None:
-                metrics_data['current_balance'] = balance
-                metrics_data['last_balance_check'] = time.time()
+                tick['current_balance'] = balance
+                tick['last_balance_check'] = time.time()
+                # Runway reads transaction history, so it is refreshed with the balance, not per request
+                tick['runway_days'] = deposit_monitor.estimate_runway()
                 logger.info(f"Balance updated: ${balance}")
         except Exception as e:
             logger.warning(f"Balance check failed (using demo mode): {e}")
-            metrics_data['current_balance'] = 25.50  # Demo balance
-            metrics_data['last_balance_check'] = time.time()
+            tick['current_balance'] = 25.50  # Demo balance
+            tick['last_balance_check'] = time.time()
     
-    logger.info(f"Health check: {metrics_data['status']}, CPU: {cpu_usage}%, Memory: {memory.percent}%, Latency: {latency}ms, Balance: ${metrics_data.get('current_balance', 0):.2f}")
+    metrics = metrics_data.update(tick)
+    check_alerts()
     
-    # Force balance check on first run
-    if metrics_data.get('current_balance', 0) == 0:
-        try:
-            balance = deposit_monitor.check_balance()
-            if balance is not None:
-                metrics_data['current_balance'] = balance
-                metrics_data['last_balance_check'] = time.time()
-        except Exception as e:
-            logger.warning(f"Initial balance check failed (using demo mode): {e}")
-            metrics_data['current_balance'] = 25.50  # Demo balance
-            metrics_data['last_balance_check'] = time.time()
+    # Auto-healing based on predictions and current state
+    if prediction['probability'] > 0.7:
+        logger.warning(f"High failure probability detected: {prediction['probability']}")
+        # Trigger proactive healing
+        task_queue.submit('healing', _proactive_healing, metrics_data, key='proactive_healing')
+    
+    # Check for immediate issues requiring healing (one pending task per issue)
+    if cpu_usage > 90:
+        task_queue.submit('healing', enhanced_self_healing.auto_heal, 'cpu_overload', {'cpu': cpu_usage}, key='cpu_overload')
+    if memory_percent > 95:
+        task_queue.submit('healing', enhanced_self_healing.auto_heal, 'memory_pressure', {'memory': memory_percent}, key='memory_pressure')
+    
+    # Log real metrics for debugging
+    logger.info(f"Real metrics - CPU: {cpu_usage}%, Memory: {memory_percent}%, Disk: {disk_percent}%")
+    logger.info(f"Health check: {metrics['status']}, CPU: {cpu_usage}%, Memory: {memory_percent}%, Latency: {latency}ms, Balance: ${metrics.get('current_balance', 0):.2f}")
 
 def spheron_redeploy():
     """Trigger comprehensive self-healing process"""
@@ -457,10 +590,15 @@ def spheron_redeploy():
         except Exception as e:
             logger.warning(f"Memory optimization failed: {e}")
         
-        # System metrics reset
+        # System metrics reset (connected users, logs and balance carry over)
         try:
-            global metrics_data
-            metrics_data = get_initial_metrics()
+            previous = metrics_data.snapshot()
+            metrics_data.reset(dict(
+                get_initial_metrics(),
+                **{key: previous[key] for key in ('active_users', 'real_time_logs', 'current_balance', 'runway_days',
+                                                  'last_balance_check', 'balance_history') if key in previous}
+            ))
+            response_cache.invalidate()
             healing_actions.append("System metrics reset")
             logger.info("Metrics data refreshed")
         except Exception as e:
@@ -468,38 +606,8 @@ def spheron_redeploy():
         
         # URL monitoring healing
         try:
-            urls = url_monitor.get_monitored_urls()
-            healed_urls = 0
-            
-            for url_data in urls:
-                if not url_data.get('is_online', True):
-                    # Try to heal the URL
-                    result = url_monitor.check_url(url_data['url'])
-                    
-                    # Try alternative protocols if failed
-                    if not result['is_online']:
-                        original_url = url_data['url']
-                        
-                        # Try HTTP if HTTPS failed
-                        if original_url.startswith('https://'):
-                            http_url = original_url.replace('https://', 'http://')
-                            http_result = url_monitor.check_url(http_url)
-                            if http_result['is_online']:
-                                url_monitor.remove_url(original_url)
-                                url_monitor.add_url(http_url)
-                                healed_urls += 1
-                                continue
-                        
-                        # Try with www prefix
-                        if not original_url.startswith('https://www.'):
-                            www_url = original_url.replace('https://', 'https://www.')
-                            www_result = url_monitor.check_url(www_url)
-                            if www_result['is_online']:
-                                url_monitor.remove_url(original_url)
-                                url_monitor.add_url(www_url)
-                                healed_urls += 1
-                    else:
-                        healed_urls += 1
+            offline_urls = [url_data['url'] for url_data in url_monitor.get_offline_urls()]
+            healed_urls = sum(1 for _, healed_url, _, _ in url_monitor.heal_urls(offline_urls) if healed_url)
             
             healing_actions.append(f"URL healing: {healed_urls} URLs restored")
             logger.info(f"URL healing completed: {healed_urls} URLs healed")
@@ -586,27 +694,24 @@ def generate_daily_report():
     try:
         today = datetime.now().strftime('%Y-%m-%d')
         
-        daily_history = [
-            h for h in metrics_data['uptime_history']
-            if datetime.fromisoformat(h['timestamp']).date() == datetime.now().date()
-        ]
+        daily = metrics_history.aggregate('24h')
         
-        if not daily_history:
+        if not daily['samples']:
             return
         
-        uptime_pct = (sum(1 for h in daily_history if h['online']) / len(daily_history)) * 100
-        avg_latency = sum(h['latency'] for h in daily_history) / len(daily_history)
-        incidents = sum(1 for h in daily_history if not h['online'])
+        uptime_pct = daily['uptime_percentage']
+        avg_latency = daily['avg_latency']
+        incidents = daily['incidents']
         
         report_data = {
             'date': today,
             'uptime_percentage': round(uptime_pct, 2),
             'avg_latency': round(avg_latency, 2),
             'incidents': incidents,
-            'total_checks': len(daily_history),
+            'total_checks': daily['samples'],
             'metrics_summary': {
-                'avg_cpu': metrics_data['cpu_usage'],
-                'avg_memory': metrics_data['memory_usage'],
+                'avg_cpu': daily['avg_cpu'],
+                'avg_memory': daily['avg_memory'],
                 'avg_disk': metrics_data['disk_usage'],
                 'avg_network_speed': metrics_data['network_speed']
             }
@@ -627,18 +732,15 @@ def generate_weekly_report():
         week_end = week_start + timedelta(days=6)
         
         # Get weekly data
-        weekly_history = [
-            h for h in metrics_data['uptime_history']
-            if week_start <= datetime.fromisoformat(h['timestamp']) <= week_end
-        ]
+        weekly = metrics_history.aggregate('7d')
         
-        if not weekly_history:
+        if not weekly['samples']:
             return
         
         # Calculate metrics
-        uptime_pct = (sum(1 for h in weekly_history if h['online']) / len(weekly_history)) * 100
-        avg_latency = sum(h['latency'] for h in weekly_history) / len(weekly_history)
-        total_incidents = sum(1 for h in weekly_history if not h['online'])
+        uptime_pct = weekly['uptime_percentage']
+        avg_latency = weekly['avg_latency']
+        total_incidents = weekly['incidents']
         
         # Get transaction data
         transactions = deposit_monitor.get_transaction_history(days=7)
@@ -652,8 +754,8 @@ def generate_weekly_report():
             'avg_latency': round(avg_latency, 1),
             'total_incidents': total_incidents,
             'auto_fixes': auto_fixes,
-            'avg_cpu': metrics_data['cpu_usage'],
-            'avg_memory': metrics_data['memory_usage'],
+            'avg_cpu': weekly['avg_cpu'],
+            'avg_memory': weekly['avg_memory'],
             'avg_disk': metrics_data['disk_usage'],
             'current_balance': metrics_data.get('current_balance', 0),
             'weekly_spend': weekly_spend
@@ -673,25 +775,50 @@ def generate_weekly_report():
     except Exception as e:
         logger.error(f"Failed to generate weekly report: {e}")
 
+def stream_fields(metrics):
+    """Fields carried by the delta stream; rounded so sampling noise does not count as a change"""
+    return {
+        'status': metrics['status'],
+        'cpu': round(metrics['cpu_usage'], 1),
+        'memory': round(metrics['memory_usage'], 1),
+        'disk': round(metrics['disk_usage'], 1),
+        'network_speed': metrics['network_speed'],
+        'active_connections': metrics['active_connections'],
+        'temperature': metrics['temperature'],
+        'latency': metrics['latency'],
+        'uptime': metrics['uptime_percentage'],
+        'health_score': metrics['deployment_health_score'],
+        'active_users': metrics['active_users'],
+        'timings': metrics.get('probe_timings', {})
+    }
+
 def monitoring_loop():
     while True:
         check_deployment_health()
-        
-        # Calculate health score
-        metrics_data['deployment_health_score'] = calculate_health_score(metrics_data)
+        refresh_response_cache()
+        metrics = metrics_data.snapshot()
         
         # Add real-time log
-        add_real_time_log(socketio, metrics_data, f"Health check completed - Score: {metrics_data['deployment_health_score']}/100")
+        add_real_time_log(socketio, metrics_data, f"Health check completed - Score: {metrics['deployment_health_score']}/100")
+        
+        # Stream subscribers get only what changed since the last tick (plus new logs)
+        metric_stream.publish(socketio, stream_fields(metrics), metrics['real_time_logs'])
         
-        # Emit real-time updates to connected clients
+        # Full updates for clients that have not switched to the stream
         socketio.emit('metrics_update', {
-            'status': metrics_data['status'],
-            'cpu': metrics_data['cpu_usage'],
-            'memory': metrics_data['memory_usage'],
-            'latency': metrics_data['latency'],
-            'health_score': metrics_data['deployment_health_score'],
+            'status': metrics['status'],
+            'cpu': metrics['cpu_usage'],
+            'memory': metrics['memory_usage'],
+            'latency': metrics['latency'],
+            'health_score': metrics['deployment_health_score'],
+            'timings': metrics.get('probe_timings', {}),
             'timestamp': datetime.now().isoformat()
-        })
+        }, to=LEGACY_ROOM)
+        
+        # Per-deployment updates go to clients subscribed to that deployment
+        for deployment in deployment_registry.all():
+            socketio.emit('deployment_update', dict(deployment.to_dict(), timestamp=datetime.now().isoformat()),
+                          to=deployment.room)
         
         # Daily report at midnight
         if datetime.now().hour == 0 and datetime.now().minute == 0:
@@ -705,7 +832,27 @@ def monitoring_loop():
             generate_weekly_report()
             add_real_time_log(socketio, metrics_data, "Weekly report generated and emailed", 'info')
         
-        time.sleep(3)  # Faster refresh for real-time feel
+        time.sleep(MONITOR_INTERVAL)  # Faster refresh for real-time feel
+
+def current_user():
+    """The authenticated user; also hands URLs saved before per-user scoping to their owner"""
+    user_id = get_jwt_identity()
+    url_monitor.claim_unowned(user_id)
+    return user_id
+
+def emit_url_check(result):
+    """Stream a background URL check result to its owner's sockets"""
+    url_data = url_monitor.get_url(result['url'])
+    if url_data is None:
+        return  # Removed while the check ran
+    socketio.emit('url_check', {
+        'url': result['url'],
+        'status_code': result['status_code'],
+        'is_online': result['is_online'],
+        'response_time': result['response_time'],
+        'timings': result.get('timings', {}),
+        'checked_at': result['checked_at']
+    }, to=user_room(url_data.get('user_id', 'default')))
 
 # API Routes
 @app.route('/auth/signup', methods=['POST'])
@@ -787,57 +934,122 @@ def login():
         production_logger.log_error_with_context(e, {'operation': 'login', 'username': data.get('username') if data else 'unknown'})
         return jsonify({'error': f'Login failed: {str(e)}'}), 500
 
-@app.route('/status', methods=['GET'])
-@jwt_required()
-def get_status():
-    return jsonify({
-        'status': metrics_data['status'],
-        'uptime': metrics_data['uptime_percentage'],
-        'latency': metrics_data['latency'],
+def render_status(deployment):
+    """Status payload for one deployment"""
+    # One consistent view of the host metrics and the deployment
+    metrics = metrics_data.snapshot()
+    state = deployment.state
+    return {
+        'deployment': deployment.name,
+        'url': deployment.url,
+        'status': state['status'],
+        'uptime': state['uptime_percentage'],
+        'latency': state['latency'],
+        'health_score': state['health_score'],
         'metrics': {
-            'cpu': metrics_data['cpu_usage'],
-            'memory': metrics_data['memory_usage'],
-            'disk': metrics_data['disk_usage'],
-            'network_speed': metrics_data['network_speed'],
-            'active_connections': metrics_data['active_connections'],
-            'temperature': metrics_data['temperature']
+            'cpu': metrics['cpu_usage'],
+            'memory': metrics['memory_usage'],
+            'disk': metrics['disk_usage'],
+            'network_speed': metrics['network_speed'],
+            'active_connections': metrics['active_connections'],
+            'temperature': metrics['temperature']
         },
         'financial': {
-            'current_balance': metrics_data.get('current_balance', 0),
-            'runway_days': deposit_monitor.estimate_runway(),
-            'last_balance_check': metrics_data.get('last_balance_check')
+            'current_balance': metrics.get('current_balance', 0),
+            'runway_days': metrics.get('runway_days'),
+            'last_balance_check': metrics.get('last_balance_check')
         },
-        'logs_summary': metrics_data['logs_summary'],
-        'last_checked': metrics_data['last_checked'],
-        'history': metrics_data['uptime_history'][-20:],
-        'alerts': metrics_data['alerts'][-10:]
-    })
+        'logs_summary': metrics['logs_summary'],
+        'last_checked': state['last_checked'] or metrics['last_checked'],
+        'history': deployment.history.tail(20),
+        'windows': deployment.history.aggregates(),
+        'deployments': deployment_registry.summary(),
+        'alerts': metrics['alerts'][-10:]
+    }
+
+def render_alerts():
+    """Alerts payload"""
+    alerts = metrics_data['alerts']
+    return {
+        'alerts': alerts[-50:],
+        'active_alerts': [a for a in alerts[-10:] if a.get('severity') in ['warning', 'critical']]
+    }
+
+def render_system_info():
+    """Host facts payload"""
+    system = system_sampler.get_snapshot()
+    boot_time = datetime.fromtimestamp(system['boot_time'])
+    return {
+        'hostname': os.uname().nodename,
+        'platform': os.uname().sysname,
+        'architecture': os.uname().machine,
+        'boot_time': boot_time.isoformat(),
+        'uptime_seconds': int(time.time() - system['boot_time']),
+        'cpu_count': system['cpu_count'],
+        'memory_total': round(system['memory_total'] / (1024**3), 2)
+    }
+
+def refresh_response_cache():
+    """Serialize the polled payloads once per tick so requests only send bytes"""
+    try:
+        for deployment in deployment_registry.all():
+            response_cache.put(('status', deployment.name), app.json.dumps(render_status(deployment)))
+        response_cache.put('alerts', app.json.dumps(render_alerts()))
+        response_cache.put('system-info', app.json.dumps(render_system_info()))
+    except Exception as e:
+        logger.error(f"Response cache refresh failed: {e}")
+
+def cached_json(key, render):
+    """Serve a cached payload with its ETag, answering 304 when the client already has it"""
+    entry = response_cache.get(key)
+    if entry is None:
+        # Nothing cached yet (first tick still running, or invalidated): render now
+        entry = response_cache.put(key, app.json.dumps(render()))
+    body, etag = entry
+    response = app.response_class(body, mimetype='application/json')
+    if etag:
+        response.set_etag(etag)
+    # Clients may keep the body but must revalidate it on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/status', methods=['GET'])
+@jwt_required()
+def get_status():
+    name = request.args.get('deployment')
+    deployment = deployment_registry.get(name) if name else deployment_registry.primary
+    if deployment is None:
+        return jsonify({'error': f'Unknown deployment: {name}'}), 404
+    return cached_json(('status', deployment.name), lambda: render_status(deployment))
+
+@app.route('/deployments', methods=['GET'])
+@jwt_required()
+def get_deployments():
+    return jsonify({'deployments': deployment_registry.summary()})
 
 @app.route('/alerts', methods=['GET'])
 @jwt_required()
 def get_alerts():
-    return jsonify({
-        'alerts': metrics_data['alerts'][-50:],
-        'active_alerts': [a for a in metrics_data['alerts'][-10:] if a.get('severity') in ['warning', 'critical']]
-    })
+    return cached_json('alerts', render_alerts)
 
 @app.route('/system-info', methods=['GET'])
 @jwt_required()
 def get_system_info():
     try:
-        boot_time = datetime.fromtimestamp(psutil.boot_time())
-        return jsonify({
-            'hostname': os.uname().nodename,
-            'platform': os.uname().system,
-            'architecture': os.uname().machine,
-            'boot_time': boot_time.isoformat(),
-            'uptime_seconds': int(time.time() - psutil.boot_time()),
-            'cpu_count': psutil.cpu_count(),
-            'memory_total': round(psutil.virtual_memory().total / (1024**3), 2)
-        })
+        return cached_json('system-info', render_system_info)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/system/collectors', methods=['GET'])
+@jwt_required()
+def get_system_collectors():
+    return jsonify({'collectors': system_sampler.get_collector_stats()})
+
+@app.route('/system/tasks', methods=['GET'])
+@jwt_required()
+def get_system_tasks():
+    return jsonify(task_queue.get_stats())
+
 @app.route('/fix', methods=['POST'])
 @jwt_required()
 def fix_deployment():
@@ -859,7 +1071,10 @@ def fix_deployment():
         log_action('redeploy', status, message)
         
         if success:
-            threading.Timer(10.0, check_deployment_health).start()
+            # The monitoring loop re-probes every deployment on its next tick; no
+            # separate check here, which would race the loop over deployment state
+            for deployment in deployment_registry.all():
+                deployment.next_probe_at = 0
         
         return jsonify({
             'message': message,
@@ -950,12 +1165,51 @@ def get_weekly_reports():
 @jwt_required()
 def get_advanced_metrics():
     try:
-        advanced_data = advanced_monitor.get_comprehensive_status(DEPLOYMENT_URL)
+        mode = request.args.get('mode')
+        if mode not in (None, 'parallel', 'combined'):
+            return jsonify({'error': 'mode must be parallel or combined'}), 400
+        name = request.args.get('deployment')
+        deployment = deployment_registry.get(name) if name else deployment_registry.primary
+        if deployment is None:
+            return jsonify({'error': f'Unknown deployment: {name}'}), 404
+        advanced_data = advanced_monitor.get_comprehensive_status(deployment.url, mode=mode)
         return jsonify(advanced_data)
     except Exception as e:
         logger.error(f"Failed to get advanced metrics: {e}")
         return jsonify({'error': 'Failed to fetch advanced metrics'}), 500
 
+@app.route('/advanced-metrics/fleet', methods=['GET'])
+@jwt_required()
+def get_fleet_advanced_metrics():
+    try:
+        # Only the caller's own URLs
+        urls = [url_data['url'] for url_data in url_monitor.get_monitored_urls(current_user())]
+        fleet = advanced_monitor.get_fleet_status(urls)
+        return jsonify({
+            'urls': fleet,
+            'count': len(fleet),
+            'stale': sum(1 for status in fleet if status.get('stale') or status.get('pending')),
+            'last_refresh': getattr(advanced_monitor, 'last_fleet_refresh', None)
+        })
+    except Exception as e:
+        logger.error(f"Failed to get fleet advanced metrics: {e}")
+        return jsonify({'error': 'Failed to fetch fleet advanced metrics'}), 500
+
+@app.route('/certificates/expiring', methods=['GET'])
+@jwt_required()
+def get_expiring_certificates():
+    """List cached certificates of monitored URLs expiring within N days"""
+    try:
+        days = float(request.args.get('days', 30))
+        urls = [url_data['url'] for url_data in url_monitor.get_monitored_urls(current_user())] + deployment_registry.urls()
+        hostnames = {urlparse(url).hostname for url in urls if url.startswith('https://')}
+        
+        certificates = advanced_monitor.get_expiring_certificates(days, hostnames)
+        return jsonify({'days': days, 'count': len(certificates), 'certificates': certificates})
+    except Exception as e:
+        logger.error(f"Failed to list expiring certificates: {e}")
+        return jsonify({'error': 'Failed to list expiring certificates'}), 500
+
 @app.route('/send-test-notification', methods=['POST'])
 @jwt_required()
 def send_test_notification():
@@ -977,7 +1231,14 @@ def add_monitored_url():
         if not url:
             return jsonify({'error': 'URL is required'}), 400
         
-        result = url_monitor.add_url(url)
+        result = url_monitor.add_url(
+            url,
+            user_id=current_user(),
+            interval=data.get('interval'),
+            timeout=data.get('timeout'),
+            jitter=data.get('jitter'),
+            probe_mode=data.get('probe_mode')
+        )
         
         if result['success']:
             add_real_time_log(socketio, metrics_data, f"Added URL monitoring: {url}", 'info')
@@ -993,12 +1254,35 @@ def add_monitored_url():
 @jwt_required()
 def get_monitored_urls():
     try:
-        urls = url_monitor.get_monitored_urls()
+        # Callers see only the URLs they added
+        user_id = current_user()
+        if request.args.get('status') == 'offline':
+            urls = url_monitor.get_offline_urls(user_id)
+        else:
+            urls = url_monitor.get_monitored_urls(user_id)
         return jsonify(urls)
     except Exception as e:
         logger.error(f"Failed to get monitored URLs: {e}")
         return jsonify({'error': 'Failed to fetch URLs'}), 500
 
+@app.route('/url-scheduler/stats', methods=['GET'])
+@jwt_required()
+def get_url_scheduler_stats():
+    try:
+        return jsonify(url_scheduler.get_stats())
+    except Exception as e:
+        logger.error(f"Failed to get scheduler stats: {e}")
+        return jsonify({'error': 'Failed to fetch scheduler stats'}), 500
+
+@app.route('/dns/stats', methods=['GET'])
+@jwt_required()
+def get_dns_stats():
+    try:
+        return jsonify(dns_cache.get_stats())
+    except Exception as e:
+        logger.error(f"Failed to get DNS stats: {e}")
+        return jsonify({'error': 'Failed to fetch DNS stats'}), 500
+
 @app.route('/check-url', methods=['POST'])
 @jwt_required()
 def check_single_url():
@@ -1026,7 +1310,7 @@ def remove_monitored_url():
         if not url:
             return jsonify({'error': 'URL is required'}), 400
         
-        result = url_monitor.remove_url(url)
+        result = url_monitor.remove_url(url, current_user())
         
         if result['success']:
             add_real_time_log(socketio, metrics_data, f"Removed URL monitoring: {url}", 'info')
@@ -1041,7 +1325,7 @@ def remove_monitored_url():
 @jwt_required()
 def check_all_monitored_urls():
     try:
-        results = url_monitor.check_all_urls()
+        results = url_monitor.check_all_urls(current_user())
         add_real_time_log(socketio, metrics_data, f"Checked {len(results)} monitored URLs", 'info')
         return jsonify(results)
     except Exception as e:
@@ -1059,42 +1343,19 @@ def heal_single_url():
         if not url:
             return jsonify({'error': 'URL is required'}), 400
         
-        # Perform healing actions
-        healing_actions = []
+        # Healing re-keys the entry, so only its owner may do it
+        if url_monitor.get_url(url, current_user()) is None:
+            return jsonify({'error': 'URL not found'}), 404
         
-        # 1. Check URL status
-        result = url_monitor.check_url(url)
-        healing_actions.append(f"Status check: {result['status_code']}")
-        
-        # 2. If offline, try different approaches
-        if not result['is_online']:
-            # Try with different protocols
-            if url.startswith('https://'):
-                http_url = url.replace('https://', 'http://')
-                http_result = url_monitor.check_url(http_url)
-                if http_result['is_online']:
-                    healing_actions.append("Switched to HTTP protocol")
-                    # Update URL in monitoring
-                    url_monitor.remove_url(url)
-                    url_monitor.add_url(http_url)
-                    result = http_result
-            
-            # Try with www prefix
-            if not result['is_online'] and not url.startswith('https://www.'):
-                www_url = url.replace('https://', 'https://www.')
-                www_result = url_monitor.check_url(www_url)
-                if www_result['is_online']:
-                    healing_actions.append("Added www prefix")
-                    url_monitor.remove_url(url)
-                    url_monitor.add_url(www_url)
-                    result = www_result
-        
-        # 3. Clear DNS cache (simulated)
-        healing_actions.append("DNS cache cleared")
-        
-        # 4. Retry connection
-        final_result = url_monitor.check_url(url)
-        healing_actions.append(f"Final status: {final_result['status_code']}")
+        # Clear cached DNS records first so the variant probes re-resolve
+        hostname = urlparse(url).hostname
+        dns_cache.invalidate(hostname)
+        if hostname and not hostname.startswith('www.'):
+            dns_cache.invalidate('www.' + hostname)
+        
+        # Probe the URL and its protocol/www variants concurrently
+        healed_url, final_result, healing_actions = url_monitor.heal_url(url)
+        healing_actions.insert(0, "DNS cache cleared")
         
         message = f"Healing completed. Actions: {', '.join(healing_actions)}"
         add_real_time_log(socketio, metrics_data, f"Healed URL {url}: {message}", 'info')
@@ -1115,19 +1376,19 @@ def heal_single_url():
 def heal_all_urls():
     """Heal all monitored URLs"""
     try:
-        urls = url_monitor.get_monitored_urls()
+        user_id = current_user()
+        urls = url_monitor.get_monitored_urls(user_id)
         healed_count = 0
         
-        for url_data in urls:
-            if not url_data.get('is_online', True):
-                # Attempt healing
-                try:
-                    result = url_monitor.check_url(url_data['url'])
-                    if result['is_online']:
-                        healed_count += 1
-                        add_real_time_log(socketio, metrics_data, f"Healed URL: {url_data['url']}", 'success')
-                except Exception as e:
-                    add_real_time_log(socketio, metrics_data, f"Failed to heal {url_data['url']}: {str(e)}", 'warning')
+        # Heal the caller's offline URLs in parallel, each probing its variants concurrently
+        offline_urls = [url_data['url'] for url_data in url_monitor.get_offline_urls(user_id)]
+        
+        for url, healed_url, result, actions in url_monitor.heal_urls(offline_urls):
+            if healed_url:
+                healed_count += 1
+                add_real_time_log(socketio, metrics_data, f"Healed URL: {healed_url}", 'success')
+            else:
+                add_real_time_log(socketio, metrics_data, f"Failed to heal {url}: {result.get('error', 'still offline')}", 'warning')
         
         add_real_time_log(socketio, metrics_data, f"Healing completed: {healed_count} URLs healed", 'info')
         
@@ -1204,7 +1465,7 @@ def get_healing_stats():
 def trigger_proactive_healing():
     """Manually trigger proactive healing"""
     try:
-        threading.Thread(target=_proactive_healing, args=(metrics_data,), daemon=True).start()
+        task_queue.submit('healing', _proactive_healing, metrics_data, key='proactive_healing')
         add_real_time_log(socketio, metrics_data, "Proactive healing triggered manually", 'info')
         return jsonify({'success': True, 'message': 'Proactive healing initiated'})
     except Exception as e:
@@ -1377,49 +1638,33 @@ def optimize_system_resources():
 def health_check():
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
 
+def seconds_since(iso_timestamp):
+    """Age of an ISO timestamp in seconds, or None"""
+    if not iso_timestamp:
+        return None
+    return round(max((datetime.now() - datetime.fromisoformat(iso_timestamp)).total_seconds(), 0), 1)
+
 @app.route('/api/real-metrics', methods=['GET'])
 def get_real_metrics():
-    """Get real-time system metrics"""
+    """Get the latest host sample and deployment measurement (no probing)"""
     try:
-        # Force fresh CPU reading
-        cpu_usage = psutil.cpu_percent(interval=0.1)
-        if cpu_usage == 0:
-            cpu_usage = psutil.cpu_percent(interval=0.5)
-        
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        # Get network speed
-        try:
-            net_io = psutil.net_io_counters()
-            current_time = time.time()
-            
-            if hasattr(get_real_metrics, 'last_net_time'):
-                time_delta = current_time - get_real_metrics.last_net_time
-                bytes_delta = (net_io.bytes_sent + net_io.bytes_recv) - get_real_metrics.last_net_bytes
-                network_speed = round((bytes_delta / time_delta) / 1024, 1) if time_delta > 0 else 0
-            else:
-                network_speed = 0
-            
-            get_real_metrics.last_net_time = current_time
-            get_real_metrics.last_net_bytes = net_io.bytes_sent + net_io.bytes_recv
-        except:
-            network_speed = 0
-        
-        # Check main deployment URL latency
-        try:
-            start_time = time.time()
-            response = requests.get(DEPLOYMENT_URL, timeout=5)
-            latency = round((time.time() - start_time) * 1000, 2)
-        except:
-            latency = 0
+        # Both are snapshots kept current by the background sampler and the monitoring loop
+        system = system_sampler.get_snapshot()
+        deployment = deployment_registry.primary
+        state = deployment.state
+        # Age of the last probe that actually ran, not of the last tick
+        measured_at = (deployment.last_probe or {}).get('checked_at')
         
         return jsonify({
-            'cpu': round(max(cpu_usage, 0.1), 1),
-            'memory': round(memory.percent, 1),
-            'disk': round(disk.percent, 1),
-            'network_speed': network_speed,
-            'latency': latency,
+            'cpu': round(max(system['cpu'], 0.1), 1),
+            'memory': round(system['memory'], 1),
+            'disk': round(system['disk'], 1),
+            'network_speed': system['network_speed'],
+            'status': state['status'],
+            'latency': state['latency'],
+            'measured_at': measured_at,
+            'age_seconds': seconds_since(measured_at),
+            'system_age_seconds': round(max(time.time() - system['sampled_at'], 0), 1),
             'timestamp': datetime.now().isoformat()
         })
         
@@ -1427,6 +1672,47 @@ def get_real_metrics():
         logger.error(f"Failed to get real metrics: {e}")
         return jsonify({'error': 'Failed to get metrics'}), 500
 
+# Last on-demand probe, shared by every caller of /api/real-metrics/probe
+fresh_probe_lock = threading.Lock()
+fresh_probe = {'at': 0, 'result': None}
+
+@app.route('/api/real-metrics/probe', methods=['POST'])
+@jwt_required()
+def probe_real_metrics():
+    """Probe the primary deployment now, at most once per FRESH_PROBE_INTERVAL"""
+    # Non-blocking: a caller arriving while a probe is in flight gets rate limited, not queued
+    if not fresh_probe_lock.acquire(blocking=False):
+        return jsonify({'error': 'Probe already in progress', 'last_probe': fresh_probe['result']}), 429
+    try:
+        wait = fresh_probe['at'] + FRESH_PROBE_INTERVAL - time.monotonic()
+        if fresh_probe['result'] is not None and wait > 0:
+            response = jsonify({
+                'error': 'Probe rate limited',
+                'retry_after': round(wait, 1),
+                'last_probe': fresh_probe['result']
+            })
+            response.headers['Retry-After'] = str(int(wait) + 1)
+            return response, 429
+        
+        deployment = deployment_registry.primary
+        probe = url_monitor.check_url(deployment.url, timeout=5, fresh=True)
+        result = {
+            'deployment': deployment.name,
+            'url': deployment.url,
+            'status': 'Online' if probe['is_online'] else 'Offline',
+            'latency': round(probe.get('response_time') or 0, 2) if 'error' not in probe else 0,
+            'timings': probe.get('timings', {}),
+            'error': probe.get('error'),
+            'measured_at': probe.get('checked_at')
+        }
+        fresh_probe.update(at=time.monotonic(), result=result)
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Fresh probe failed: {e}")
+        return jsonify({'error': 'Probe failed'}), 500
+    finally:
+        fresh_probe_lock.release()
+
 @app.route('/')
 def serve_frontend():
     return send_from_directory('../frontend', 'auth.html')
@@ -1450,8 +1736,11 @@ def serve_static(path):
 if __name__ == '__main__':
     init_db()
     
+    # Start sampling host metrics in the background
+    system_sampler.start()
+    
     # Setup WebSocket handlers
-    setup_websocket_handlers(socketio, metrics_data)
+    setup_websocket_handlers(socketio, metrics_data, deployment_registry)
     
     # Initialize real data immediately
     check_deployment_health()
@@ -1460,14 +1749,23 @@ if __name__ == '__main__':
     monitoring_thread = threading.Thread(target=monitoring_loop, daemon=True)
     monitoring_thread.start()
     
-    # Start cleanup thread for intelligent alerting
-    def cleanup_loop():
-        while True:
-            time.sleep(3600)  # Every hour
+    # Start per-URL background checks
+    url_scheduler.on_result = emit_url_check
+    url_scheduler.start()
+    
+    # Keep fleet-wide SSL/DNS/port inspections warm in the background
+    advanced_monitor.start_fleet_refresh(
+        lambda: [url_data['url'] for url_data in url_monitor.get_monitored_urls()]
+    )
+    
+    # Clean up intelligent alerting data every hour on the background queue
+    def cleanup_alerting_data():
+        try:
             intelligent_alerting.cleanup_old_data()
+        finally:
+            task_queue.submit_later(3600, 'maintenance', cleanup_alerting_data)
     
-    cleanup_thread = threading.Thread(target=cleanup_loop, daemon=True)
-    cleanup_thread.start()
+    task_queue.submit_later(3600, 'maintenance', cleanup_alerting_data)
     
     # Wait a moment for initial data
     time.sleep(2)
@@ -1480,7 +1778,7 @@ if __name__ == '__main__':
     
     port = int(os.environ.get('PORT', 5000))
     print(f"🚀 Server starting on http://localhost:{port}")
-    print(f"📊 Monitoring: {DEPLOYMENT_URL}")
+    print(f"📊 Monitoring: {', '.join(deployment_registry.urls())}")
     print(f"💰 Balance monitoring: Demo mode")
     print(f"📧 Email alerts: {'Enabled' if hasattr(notification_service, 'email_enabled') and notification_service.email_enabled else 'Disabled'}")
     print(f"📱 Telegram alerts: {'Enabled' if hasattr(notification_service, 'telegram_enabled') and notification_service.telegram_enabled else 'Disabled'}")
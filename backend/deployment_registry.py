@@ -0,0 +1,128 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+from metrics_history import MetricsHistory, metrics_history
+
+logger = logging.getLogger(__name__)
+
+class Deployment:
+    """One monitored deployment with its own state and history"""
+
+    def __init__(self, name, url, history):
+        self.name = name
+        self.url = url
+        self.history = history
+        self.room = f"deployment:{name}"
+        self.next_probe_at = 0
+        self.last_probe = None
+        self.state = {
+            'name': name,
+            'url': url,
+            'status': 'Unknown',
+            'is_online': True,
+            'was_down': False,
+            'latency': 0,
+            'uptime_percentage': 100,
+            'health_score': 100,
+            'probe_timings': {},
+            'last_checked': None
+        }
+
+    def to_dict(self):
+        return dict(self.state)
+
+class DeploymentRegistry:
+    """The deployments checked by the monitoring loop, probed concurrently"""
+
+    # Shortest gap between history samples: the monitoring loop's interval
+    SAMPLE_INTERVAL = 3
+
+    def __init__(self, workers=None, deadline=None):
+        # Own pool, so the monitoring tick never queues behind scheduled URL checks
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or int(os.environ.get('DEPLOYMENT_CHECK_WORKERS', '8')),
+            thread_name_prefix='deployment-check'
+        )
+        self.deadline = deadline or float(os.environ.get('DEPLOYMENT_CHECK_DEADLINE', '15'))
+        self._inflight = {}  # name -> future of a check that overran the deadline
+        self.history_capacity = int(os.environ.get('DEPLOYMENT_HISTORY_CAPACITY', '28800'))
+        # Keep only as long as the buffer can hold, so windows it can't fill are left out
+        self.history_retention = self.history_capacity * self.SAMPLE_INTERVAL
+        self._deployments = {}
+
+        # DEPLOYMENT_URL is the primary deployment and keeps the global history;
+        # DEPLOYMENT_URLS adds more as comma-separated "url" or "name=url" entries
+        self.primary = self.add(
+            os.environ.get('DEPLOYMENT_NAME'),
+            os.environ.get('DEPLOYMENT_URL', 'https://google.com'),
+            metrics_history
+        )
+        for entry in os.environ.get('DEPLOYMENT_URLS', '').split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            name, _, url = entry.partition('=') if '=' in entry.split('://')[0] else ('', '', entry)
+            if any(deployment.url == url for deployment in self._deployments.values()):
+                continue
+            self.add(name or None, url)
+
+    def add(self, name, url, history=None):
+        """Register a deployment; the name defaults to the URL's hostname"""
+        name = name or urlparse(url).hostname or url
+        base, suffix = name, 2
+        while name in self._deployments:
+            name = f"{base}-{suffix}"
+            suffix += 1
+
+        deployment = Deployment(name, url, history or MetricsHistory(
+            capacity=self.history_capacity, retention=self.history_retention
+        ))
+        self._deployments[name] = deployment
+        logger.info(f"Monitoring deployment {name}: {url}")
+        return deployment
+
+    def get(self, name):
+        return self._deployments.get(name)
+
+    def all(self):
+        return list(self._deployments.values())
+
+    def urls(self):
+        return [deployment.url for deployment in self._deployments.values()]
+
+    def check_all(self, check):
+        """Run check(deployment) for every deployment concurrently, returning results in order.
+
+        Checks not finished within the deadline give None; they keep running
+        and update their deployment when they finish, and the deployment is
+        not checked again until they have.
+        """
+        futures = []
+        for deployment in self._deployments.values():
+            future = self._inflight.get(deployment.name)
+            if future is None or future.done():
+                future = self._executor.submit(check, deployment)
+            futures.append((deployment, future))
+        done, _ = wait([future for _, future in futures], timeout=self.deadline)
+        results = []
+        for deployment, future in futures:
+            if future not in done:
+                logger.warning(f"Check for deployment {deployment.name} still running after {self.deadline}s")
+                self._inflight[deployment.name] = future
+                results.append(None)
+                continue
+            self._inflight.pop(deployment.name, None)
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Check failed for deployment {deployment.name}: {e}")
+                results.append(None)
+        return results
+
+    def summary(self):
+        """Latest state of every deployment"""
+        return [deployment.to_dict() for deployment in self._deployments.values()]
+
+# Global instance
+deployment_registry = DeploymentRegistry()
@@ -1,6 +1,6 @@
 import os
 import logging
-import requests
+from http_pool import http_pool
 from datetime import datetime, timedelta
 from notification_service import notification_service
 from mongodb_client import mongodb_client
@@ -33,7 +33,7 @@ class DepositMonitor:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.get(
+            response = http_pool.get(
                 'https://api.spheron.network/v1/account/balance',
                 headers=headers,
                 timeout=10
@@ -0,0 +1,178 @@
+import os
+import time
+import socket
+import logging
+import threading
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor, wait
+
+try:
+    import dns.resolver
+except ImportError:
+    dns = None
+
+logger = logging.getLogger(__name__)
+
+class DNSCache:
+    """Shared resolver cache that honours record TTLs"""
+
+    def __init__(self):
+        self.min_ttl = float(os.environ.get('DNS_MIN_TTL', '5'))
+        self.max_ttl = float(os.environ.get('DNS_MAX_TTL', '3600'))
+        self.default_ttl = float(os.environ.get('DNS_DEFAULT_TTL', '60'))
+        self.negative_ttl = float(os.environ.get('DNS_NEGATIVE_TTL', '30'))
+        self.lifetime = float(os.environ.get('DNS_TIMEOUT', '5'))
+        self.batch_concurrency = int(os.environ.get('DNS_BATCH_CONCURRENCY', '16'))
+        self.hosts_file = os.environ.get('DNS_HOSTS_FILE', '/etc/hosts')
+        self._hosts = {}  # hostname -> addresses from the hosts file
+        self._hosts_mtime = None
+
+        self._resolver = None
+        if dns is not None:
+            try:
+                self._resolver = dns.resolver.Resolver()
+            except Exception as e:
+                logger.warning(f"dnspython resolver unavailable, using system resolver: {e}")
+        # A and AAAA queries for one lookup run side by side
+        self._query_executor = ThreadPoolExecutor(max_workers=self.batch_concurrency * 2, thread_name_prefix='dns')
+
+        # hostname -> (expires_at, addresses); addresses is None for negative entries
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    def _clamp_ttl(self, ttl):
+        return min(max(ttl, self.min_ttl), self.max_ttl)
+
+    def _hosts_lookup(self, hostname):
+        """Addresses for a hostname from the hosts file (re-read when it changes), or None"""
+        try:
+            mtime = os.stat(self.hosts_file).st_mtime
+        except OSError:
+            return None
+        if mtime != self._hosts_mtime:
+            hosts = {}
+            with open(self.hosts_file) as f:
+                for line in f:
+                    fields = line.split('#', 1)[0].split()
+                    for name in fields[1:]:
+                        hosts.setdefault(name.lower(), []).append(fields[0])
+            self._hosts, self._hosts_mtime = hosts, mtime
+        addresses = self._hosts.get(hostname.lower())
+        if not addresses:
+            return None
+        return sorted(dict.fromkeys(addresses), key=lambda address: ':' in address)
+
+    def _resolve_rdtype(self, hostname, rdtype):
+        try:
+            answer = self._resolver.resolve(hostname, rdtype, raise_on_no_answer=False, lifetime=self.lifetime)
+        except Exception:
+            # Not only DNSException: eventlet (via flask_socketio) loads a patched
+            # copy of dnspython whose exceptions are distinct classes
+            return None
+        return answer.rrset
+
+    def _query(self, hostname):
+        """Resolve A and AAAA records, returning (addresses, ttl)"""
+        # The hosts file overrides DNS, as it does for getaddrinfo
+        addresses = self._hosts_lookup(hostname)
+        if addresses:
+            return addresses, self.default_ttl
+
+        if self._resolver is not None:
+            futures = [self._query_executor.submit(self._resolve_rdtype, hostname, rdtype) for rdtype in ('A', 'AAAA')]
+            # Both queries share one DNS_TIMEOUT budget
+            wait(futures, timeout=self.lifetime)
+            addresses, ttls = [], []
+            for future in futures:
+                rrset = future.result() if future.done() else None
+                if rrset is not None:
+                    addresses.extend(record.address for record in rrset)
+                    ttls.append(rrset.ttl)
+            if addresses:
+                return addresses, self._clamp_ttl(min(ttls))
+
+        # Fall back to the system resolver (missing dnspython, or nothing found)
+        infos = socket.getaddrinfo(hostname, None, 0, socket.SOCK_STREAM)
+        addresses = []
+        for family, _, _, _, sockaddr in sorted(infos, key=lambda info: info[0] != socket.AF_INET):
+            if sockaddr[0] not in addresses:
+                addresses.append(sockaddr[0])
+        return addresses, self.default_ttl
+
+    def resolve(self, hostname):
+        """Get all addresses for a hostname (IPv4 first), raising socket.gaierror on failure"""
+        try:
+            ipaddress.ip_address(hostname)
+            return [hostname]
+        except ValueError:
+            pass
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(hostname)
+            if entry and entry[0] > now:
+                if entry[1] is None:
+                    self.negative_hits += 1
+                    raise socket.gaierror(socket.EAI_NONAME, f"Name or service not known (cached): {hostname}")
+                self.hits += 1
+                return list(entry[1])
+            self.misses += 1
+
+        try:
+            addresses, ttl = self._query(hostname)
+        except socket.gaierror:
+            with self._lock:
+                self._cache[hostname] = (now + self.negative_ttl, None)
+            raise
+
+        with self._lock:
+            self._cache[hostname] = (now + ttl, addresses)
+        return list(addresses)
+
+    def resolve_many(self, hostnames):
+        """Resolve many hostnames concurrently; returns {hostname: addresses or {'error': ...}}"""
+        hostnames = list(dict.fromkeys(hostnames))
+        if not hostnames:
+            return {}
+
+        def resolve_one(hostname):
+            try:
+                return self.resolve(hostname)
+            except Exception as e:
+                return {'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=min(self.batch_concurrency, len(hostnames))) as pool:
+            return dict(zip(hostnames, pool.map(resolve_one, hostnames)))
+
+    def ttl_remaining(self, hostname):
+        """Seconds until the cached entry for a hostname expires"""
+        with self._lock:
+            entry = self._cache.get(hostname)
+        return round(max(entry[0] - time.monotonic(), 0), 1) if entry else 0
+
+    def invalidate(self, hostname=None):
+        """Drop one hostname, or the whole cache"""
+        with self._lock:
+            if hostname is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(hostname, None)
+
+    def get_stats(self):
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'entries': len(self._cache),
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.negative_hits) / lookups * 100, 1) if lookups else 0,
+                'backend': 'dnspython' if self._resolver is not None else 'system'
+            }
+
+# Global instance
+dns_cache = DNSCache()
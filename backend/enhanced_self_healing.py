@@ -1,7 +1,8 @@
 import logging
 import time
 import psutil
-import requests
+from http_pool import http_pool
+from url_monitor import url_monitor
 from datetime import datetime
 import threading
 
@@ -136,7 +137,7 @@ class EnhancedSelfHealing:
             successful_tests = 0
             for url in test_urls:
                 try:
-                    response = requests.get(url, timeout=5)
+                    response = http_pool.get(url, timeout=5)
                     if response.status_code == 200:
                         successful_tests += 1
                 except:
@@ -180,13 +181,10 @@ class EnhancedSelfHealing:
                         elif protocol == 'http://' and test_url.startswith('https://'):
                             test_url = test_url.replace('https://', 'http://')
                             
-                        try:
-                            response = requests.get(test_url, timeout=10)
-                            if response.status_code == 200:
-                                actions.append(f"Service accessible via {test_url}")
-                                return True, f"Service restored via {test_url}", actions
-                        except:
-                            continue
+                        # Shares any probe of the same URL already in flight
+                        if url_monitor.check_url(test_url, timeout=10)['is_online']:
+                            actions.append(f"Service accessible via {test_url}")
+                            return True, f"Service restored via {test_url}", actions
                             
             # If service still unresponsive, try generic healing
             actions.append("Attempting generic service healing")
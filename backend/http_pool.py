@@ -0,0 +1,160 @@
+import os
+import time
+import socket
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from dns_cache import dns_cache
+
+logger = logging.getLogger(__name__)
+
+# Connection phase timings (seconds) for the request running on this thread
+_phase_timings = threading.local()
+
+def _record_phase(phase, seconds):
+    timings = getattr(_phase_timings, 'current', None)
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0) + seconds
+
+def resolve_host(host, port):
+    """Resolve a host through the shared DNS cache to a list of (family, sockaddr) pairs"""
+    return [
+        (socket.AF_INET6 if ':' in address else socket.AF_INET, (address, port))
+        for address in dns_cache.resolve(host)
+    ]
+
+def _open_timed_connection(conn):
+    """Resolve and connect for a urllib3 connection, recording DNS and TCP connect times"""
+    host = conn._dns_host
+    timeout = conn.timeout if isinstance(conn.timeout, (int, float)) else socket.getdefaulttimeout()
+
+    start = time.perf_counter()
+    try:
+        addresses = resolve_host(host, conn.port)
+    except socket.gaierror as e:
+        _record_phase('dns', time.perf_counter() - start)
+        raise NewConnectionError(conn, f"Failed to resolve '{host}' ({e})") from e
+    resolved = time.perf_counter()
+    _record_phase('dns', resolved - start)
+
+    sock, error = None, None
+    for family, sockaddr in addresses:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            for option in conn.socket_options or []:
+                sock.setsockopt(*option)
+            sock.settimeout(timeout)
+            if conn.source_address:
+                sock.bind(conn.source_address)
+            sock.connect(sockaddr)
+            break
+        except OSError as e:
+            error = e
+            sock.close()
+            sock = None
+
+    connected = time.perf_counter()
+    _record_phase('connect', connected - resolved)
+
+    if sock is None:
+        if isinstance(error, socket.timeout):
+            raise ConnectTimeoutError(conn, f"Connection to {host} timed out. (connect timeout={timeout})")
+        raise NewConnectionError(conn, f"Failed to establish a new connection: {error or 'no addresses'}")
+
+    conn._setup_time = connected - start
+    return sock
+
+class TimedHTTPConnection(HTTPConnection):
+    """HTTP connection that records DNS and TCP connect phases"""
+
+    def _new_conn(self):
+        return _open_timed_connection(self)
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection that also records the TLS handshake phase"""
+
+    def _new_conn(self):
+        return _open_timed_connection(self)
+
+    def connect(self):
+        start = time.perf_counter()
+        self._setup_time = 0
+        try:
+            super().connect()
+        finally:
+            _record_phase('tls', max(time.perf_counter() - start - self._setup_time, 0))
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Adapter whose pools open phase-timed connections"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+
+class HTTPPool:
+    """Shared keep-alive HTTP session with per-host connection pools"""
+
+    def __init__(self, pool_connections=None, pool_maxsize=None):
+        # Number of distinct hosts to keep pools for, and connections kept per host
+        self.pool_connections = pool_connections or int(os.environ.get('HTTP_POOL_CONNECTIONS', '100'))
+        self.pool_maxsize = pool_maxsize or int(os.environ.get('HTTP_POOL_MAXSIZE', '10'))
+        self.session = self._create_session()
+
+    def _create_adapter(self):
+        """Create the transport adapter holding the per-host pools"""
+        return TimedHTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0
+        )
+
+    def _create_session(self):
+        """Create a session that reuses connections (and their TLS sessions) across probes"""
+        session = requests.Session()
+        adapter = self._create_adapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        # Probes must not share cookies between targets or threads
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def start_timing(self):
+        """Start recording connection phases for requests made on this thread"""
+        _phase_timings.current = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+
+    def stop_timing(self):
+        """Stop recording and return the phases (seconds) seen since start_timing"""
+        timings = getattr(_phase_timings, 'current', None) or {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+        _phase_timings.current = None
+        return timings
+
+    def request(self, method, url, **kwargs):
+        """Send a request over the shared pool"""
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        """Pooled equivalent of requests.get"""
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        """Pooled equivalent of requests.head"""
+        kwargs.setdefault('allow_redirects', False)
+        return self.request('HEAD', url, **kwargs)
+
+# Global instance
+http_pool = HTTPPool()
@@ -0,0 +1,101 @@
+import time
+import logging
+import threading
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Clients that have not subscribed to the stream keep receiving the full
+# 'metrics_update' / 'new_log' events through this room
+LEGACY_ROOM = 'legacy'
+
+class MetricStream:
+    """Delta-encoded metric stream: a keyframe on subscribe, then only the fields that changed.
+
+    Frames are built once per tick and per format, then broadcast to a room, so
+    the cost does not grow with the number of dashboards. Log entries written
+    between ticks are coalesced into the next frame, and a tick with no changes
+    sends nothing. Each frame carries `seq`; deltas also carry `base`, the seq
+    they apply to, so a client that sees a gap re-subscribes for a keyframe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._fields = {}
+        self._logs = ()
+        self.keyframe_logs = 20
+        self.frames_sent = 0
+        self.keyframes_sent = 0
+
+    def formats(self):
+        return ('json', 'msgpack') if msgpack else ('json',)
+
+    def room(self, fmt):
+        return f"metrics:{fmt}"
+
+    def resolve_format(self, requested):
+        """The requested wire format if this server supports it, else JSON"""
+        return requested if requested in self.formats() else 'json'
+
+    def _encode(self, frame, fmt):
+        # MessagePack frames go out as binary Socket.IO attachments
+        return msgpack.packb(frame, use_bin_type=True) if fmt == 'msgpack' else frame
+
+    def _new_logs(self, logs):
+        """Entries appended since the last frame (logs is the bounded, append-only log tuple)"""
+        if self._logs:
+            last = self._logs[-1]
+            for index in range(len(logs) - 1, -1, -1):
+                if logs[index] is last:
+                    return list(logs[index + 1:])
+        # First frame, or the last entry was trimmed away: send only the recent tail
+        return list(logs[-self.keyframe_logs:])
+
+    def publish(self, socketio, fields, logs=()):
+        """Send the changes since the last tick to every stream subscriber; returns the frame or None"""
+        with self._lock:
+            changed = {key: value for key, value in fields.items()
+                       if key not in self._fields or self._fields[key] != value}
+            removed = [key for key in self._fields if key not in fields]
+            new_logs = self._new_logs(logs)
+            self._fields = dict(fields)
+            self._logs = tuple(logs)
+            if not changed and not removed and not new_logs:
+                return None
+
+            self._seq += 1
+            frame = {'seq': self._seq, 'base': self._seq - 1, 'ts': round(time.time(), 3)}
+            if changed:
+                frame['set'] = changed
+            if removed:
+                frame['unset'] = removed
+            if new_logs:
+                frame['logs'] = new_logs
+
+            # Emitting under the lock keeps deltas ordered after any keyframe already sent
+            for fmt in self.formats():
+                socketio.emit('metrics_delta', self._encode(frame, fmt), to=self.room(fmt))
+            self.frames_sent += 1
+            return frame
+
+    def send_keyframe(self, send, fmt):
+        """Send the full current state to one client through send(event, data)"""
+        with self._lock:
+            frame = {
+                'seq': self._seq,
+                'ts': round(time.time(), 3),
+                'format': fmt,
+                'fields': dict(self._fields),
+                'logs': list(self._logs[-self.keyframe_logs:])
+            }
+            send('metrics_keyframe', self._encode(frame, fmt))
+            self.keyframes_sent += 1
+            return frame
+
+# Global instance
+metric_stream = MetricStream()
@@ -0,0 +1,158 @@
+import os
+import time
+import logging
+import threading
+from array import array
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Sliding windows with incrementally maintained aggregates
+WINDOWS = {'5m': 300, '1h': 3600, '24h': 86400, '7d': 604800}
+
+class WindowAggregate:
+    """Running count, sums and min/max over the samples of one sliding window"""
+
+    FIELDS = ('latency', 'cpu', 'memory')
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.first = 0  # Oldest sample number still in the window
+        self.count = 0
+        self.online = 0
+        self.sums = dict.fromkeys(self.FIELDS, 0.0)
+        # Monotonic deques of (sample number, value): fronts are the window min/max
+        self._mins = {field: deque() for field in self.FIELDS}
+        self._maxes = {field: deque() for field in self.FIELDS}
+
+    def add(self, number, online, values):
+        self.count += 1
+        self.online += online
+        for field, value in values.items():
+            self.sums[field] += value
+            mins, maxes = self._mins[field], self._maxes[field]
+            while mins and mins[-1][1] >= value:
+                mins.pop()
+            mins.append((number, value))
+            while maxes and maxes[-1][1] <= value:
+                maxes.pop()
+            maxes.append((number, value))
+
+    def remove(self, number, online, values):
+        """Drop the oldest sample (which must be sample `number`)"""
+        self.first = number + 1
+        self.count -= 1
+        self.online -= online
+        for field, value in values.items():
+            self.sums[field] = self.sums[field] - value if self.count else 0.0
+            for extremes in (self._mins[field], self._maxes[field]):
+                if extremes and extremes[0][0] == number:
+                    extremes.popleft()
+
+    def snapshot(self):
+        """Current aggregates; O(1)"""
+        if not self.count:
+            return {'samples': 0, 'uptime_percentage': None, 'incidents': 0}
+        snapshot = {
+            'samples': self.count,
+            'uptime_percentage': round(self.online / self.count * 100, 2),
+            'incidents': self.count - self.online
+        }
+        for field in self.FIELDS:
+            snapshot[f'avg_{field}'] = round(self.sums[field] / self.count, 2)
+            snapshot[f'min_{field}'] = round(self._mins[field][0][1], 2)
+            snapshot[f'max_{field}'] = round(self._maxes[field][0][1], 2)
+        return snapshot
+
+class MetricsHistory:
+    """Fixed-capacity ring buffer of health samples, one numeric array per field"""
+
+    COLUMNS = (('timestamp', 'd'), ('online', 'b'), ('latency', 'd'), ('cpu', 'd'), ('memory', 'd'))
+
+    def __init__(self, capacity=None, retention=None):
+        # Defaults hold the longest window (7 d) of samples at the 3 s monitoring interval
+        self.capacity = capacity or int(os.environ.get('METRICS_HISTORY_CAPACITY', '201600'))
+        self.retention = retention or float(os.environ.get('METRICS_HISTORY_RETENTION', str(max(WINDOWS.values()))))
+        self.columns = {
+            name: array(typecode, bytes(array(typecode).itemsize * self.capacity))
+            for name, typecode in self.COLUMNS
+        }
+        # Absolute sample numbers; slot = number % capacity
+        self._start = 0
+        self._end = 0
+        self._lock = threading.RLock()
+        self.windows = {name: WindowAggregate(seconds) for name, seconds in WINDOWS.items()}
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _sample(self, number):
+        slot = number % self.capacity
+        return self.columns['online'][slot], {field: self.columns[field][slot] for field in WindowAggregate.FIELDS}
+
+    def _expire_windows(self, timestamp):
+        """Remove samples from each window that fell out of it or are about to be overwritten"""
+        timestamps = self.columns['timestamp']
+        overwrite_before = self._end - self.capacity + 1
+        for window in self.windows.values():
+            # Windows longer than the retention only cover what is retained
+            cutoff = timestamp - min(window.seconds, self.retention)
+            while window.first < self._end and (
+                window.first < overwrite_before or timestamps[window.first % self.capacity] <= cutoff
+            ):
+                window.remove(window.first, *self._sample(window.first))
+
+    def append(self, online, latency, cpu, memory, timestamp=None):
+        """Add a sample, overwriting the oldest when full and expiring samples past retention"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._expire_windows(timestamp)
+            
+            slot = self._end % self.capacity
+            self.columns['timestamp'][slot] = timestamp
+            self.columns['online'][slot] = 1 if online else 0
+            self.columns['latency'][slot] = latency
+            self.columns['cpu'][slot] = cpu
+            self.columns['memory'][slot] = memory
+            for window in self.windows.values():
+                window.add(self._end, 1 if online else 0, {'latency': latency, 'cpu': cpu, 'memory': memory})
+            self._end += 1
+            self._start = max(self._start, self._end - self.capacity)
+
+            # Each sample is expired at most once, so trimming is O(1) amortized
+            cutoff = timestamp - self.retention
+            timestamps = self.columns['timestamp']
+            while self._start < self._end and timestamps[self._start % self.capacity] <= cutoff:
+                self._start += 1
+
+    def aggregate(self, window):
+        """Aggregates for one sliding window ('5m', '1h', '24h' or '7d'); O(1)"""
+        with self._lock:
+            return self.windows[window].snapshot()
+
+    def aggregates(self):
+        """Aggregates for every sliding window the retention can hold"""
+        with self._lock:
+            return {
+                name: window.snapshot() for name, window in self.windows.items()
+                if window.seconds <= self.retention
+            }
+
+    def tail(self, n):
+        """The last n samples as dicts, oldest first"""
+        with self._lock:
+            first = max(self._start, self._end - n)
+            return [
+                {
+                    'timestamp': datetime.fromtimestamp(self.columns['timestamp'][i % self.capacity]).isoformat(),
+                    'online': bool(self.columns['online'][i % self.capacity]),
+                    'latency': self.columns['latency'][i % self.capacity],
+                    'cpu': self.columns['cpu'][i % self.capacity],
+                    'memory': self.columns['memory'][i % self.capacity]
+                }
+                for i in range(first, self._end)
+            ]
+
+# Global instance
+metrics_history = MetricsHistory()
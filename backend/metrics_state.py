@@ -0,0 +1,67 @@
+import threading
+from types import MappingProxyType
+
+class MetricsState:
+    """Current metrics held as an immutable snapshot that writers replace atomically.
+
+    Readers call snapshot() (or index the state directly) without locking and
+    get a consistent view. Writers are serialised: each write copies the
+    snapshot, applies its change and swaps the copy in. Lists are frozen to
+    tuples; nested dicts must be replaced, never mutated in place.
+    """
+
+    def __init__(self, initial):
+        self._lock = threading.Lock()
+        self._snapshot = self._freeze(initial)
+
+    @staticmethod
+    def _freeze(values):
+        return MappingProxyType({
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in values.items()
+        })
+
+    def snapshot(self):
+        """The current snapshot (read-only mapping)"""
+        return self._snapshot
+
+    def __getitem__(self, key):
+        return self._snapshot[key]
+
+    def __contains__(self, key):
+        return key in self._snapshot
+
+    def get(self, key, default=None):
+        return self._snapshot.get(key, default)
+
+    def update(self, changes=None, **kwargs):
+        """Swap in a snapshot with some fields replaced; returns it"""
+        with self._lock:
+            values = dict(self._snapshot)
+            values.update(changes or {}, **kwargs)
+            self._snapshot = self._freeze(values)
+            return self._snapshot
+
+    def apply(self, key, func):
+        """Replace one field with func(current value); returns the new snapshot"""
+        with self._lock:
+            values = dict(self._snapshot)
+            values[key] = func(values.get(key))
+            self._snapshot = self._freeze(values)
+            return self._snapshot
+
+    def extend(self, key, items, limit=None):
+        """Append items to a sequence field, keeping at most the last `limit`"""
+        def extended(current):
+            combined = tuple(current or ()) + tuple(items)
+            return combined[-limit:] if limit else combined
+        return self.apply(key, extended)
+
+    def append(self, key, item, limit=None):
+        return self.extend(key, (item,), limit)
+
+    def reset(self, values):
+        """Replace the whole snapshot"""
+        with self._lock:
+            self._snapshot = self._freeze(values)
+            return self._snapshot
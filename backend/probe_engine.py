@@ -0,0 +1,73 @@
+import os
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+class ProbeEngine:
+    """Bounded worker pool for running outbound probes concurrently"""
+
+    def __init__(self, max_workers=None, per_host_limit=None):
+        self.max_workers = max_workers or int(os.environ.get('PROBE_CONCURRENCY', '32'))
+        self.per_host_limit = per_host_limit or int(os.environ.get('PROBE_PER_HOST_LIMIT', '4'))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='probe')
+        self._hosts = {}  # host -> [running probes, deque of waiting (future, func, url, args, kwargs)]
+        self._lock = threading.Lock()
+
+    def _dispatch(self, host, task):
+        """Hand a task to the pool; its host slot is already taken"""
+        self._executor.submit(self._run, host, *task)
+
+    def _run(self, host, future, func, url, args, kwargs):
+        """Run a probe, then pass its host slot to the next probe waiting for that host"""
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(url, *args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                state = self._hosts[host]
+                task = state[1].popleft() if state[1] else None
+                if task is None:
+                    state[0] -= 1
+                    if not state[0]:
+                        del self._hosts[host]
+            if task is not None:
+                self._dispatch(host, task)
+
+    def submit(self, func, url, *args, **kwargs):
+        """Schedule func(url, ...) and return its future.
+
+        Probes over the per-host limit wait in a per-host queue, not in a
+        worker, so one busy host never ties up the pool.
+        """
+        host = urlparse(url).hostname or url
+        task = (Future(), func, url, args, kwargs)
+        with self._lock:
+            state = self._hosts.setdefault(host, [0, deque()])
+            if state[0] >= self.per_host_limit:
+                state[1].append(task)
+                return task[0]
+            state[0] += 1
+        self._dispatch(host, task)
+        return task[0]
+
+    def map(self, func, urls, *args, **kwargs):
+        """Probe all URLs concurrently, returning results in input order"""
+        futures = [self.submit(func, url, *args, **kwargs) for url in urls]
+        results = []
+        for url, future in zip(urls, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Probe failed for {url}: {e}")
+                results.append(None)
+        return results
+
+# Global instance
+probe_engine = ProbeEngine()
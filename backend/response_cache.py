@@ -0,0 +1,29 @@
+import hashlib
+
+class ResponseCache:
+    """Pre-serialized response bodies with strong ETags, rendered once and served many times"""
+
+    def __init__(self):
+        # key -> (body bytes, etag); entries are replaced whole, never mutated
+        self._entries = {}
+
+    def put(self, key, body):
+        """Store a rendered body and return its (body, etag) entry"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        entry = (body, hashlib.blake2b(body, digest_size=16).hexdigest())
+        self._entries[key] = entry
+        return entry
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or all of them"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+# Global instance
+response_cache = ResponseCache()
@@ -0,0 +1,189 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+import psutil
+
+logger = logging.getLogger(__name__)
+
+COST_TIERS = ('cheap', 'moderate', 'expensive')
+
+class Collector:
+    """One metric source with its cost tier, cadence and runtime statistics"""
+
+    def __init__(self, name, func, cost, interval):
+        self.name = name
+        self.func = func
+        self.cost = cost
+        self.interval = interval
+        self.next_due = 0
+        self.runs = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_run = None
+        self.last_ms = None
+        self.max_ms = 0
+        self.total_ms = 0
+
+    def run(self):
+        """Collect once, returning the values (None on failure) and recording the runtime"""
+        start = time.perf_counter()
+        try:
+            return self.func()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            logger.debug(f"Collector {self.name} failed: {e}")
+            return None
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.runs += 1
+            self.last_run = time.time()
+            self.last_ms = elapsed
+            self.max_ms = max(self.max_ms, elapsed)
+            self.total_ms += elapsed
+            self.next_due = time.monotonic() + self.interval
+
+    def get_stats(self):
+        return {
+            'name': self.name,
+            'cost': self.cost,
+            'interval': self.interval,
+            'runs': self.runs,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_run': datetime.fromtimestamp(self.last_run).isoformat() if self.last_run else None,
+            'last_ms': round(self.last_ms, 3) if self.last_ms is not None else None,
+            'avg_ms': round(self.total_ms / self.runs, 3) if self.runs else None,
+            'max_ms': round(self.max_ms, 3)
+        }
+
+class SystemSampler:
+    """Samples host metrics on a background thread into a shared snapshot"""
+
+    def __init__(self, interval=None):
+        self.interval = interval or float(os.environ.get('SYSTEM_SAMPLE_INTERVAL', '1'))
+        # Default cadence per cost tier; cheap collectors run on every sample
+        self.tier_intervals = {
+            'cheap': self.interval,
+            'moderate': float(os.environ.get('COLLECTOR_MODERATE_INTERVAL', '10')),
+            'expensive': float(os.environ.get('COLLECTOR_EXPENSIVE_INTERVAL', '30'))
+        }
+        self.collectors = {}
+        self._values = {}
+        self._thread = None
+        self._last_net = None  # (monotonic time, total bytes)
+
+        # Static host facts are read once
+        self.static = {
+            'boot_time': psutil.boot_time(),
+            'cpu_count': psutil.cpu_count(),
+            'memory_total': psutil.virtual_memory().total
+        }
+
+        # Prime the non-blocking CPU counter; the first reading after this is meaningful
+        psutil.cpu_percent(interval=None)
+
+        self.register('cpu', self._collect_cpu, 'cheap', defaults={'cpu': 0})
+        self.register('memory', self._collect_memory, 'cheap', defaults={'memory': 0})
+        self.register('disk', self._collect_disk, 'cheap', defaults={'disk': 0})
+        self.register('network', self._collect_network, 'cheap',
+                      defaults={'network_speed': 0, 'bytes_sent': 0, 'bytes_recv': 0})
+        # The kernel's socket tables skip psutil's walk over every process's file descriptors
+        if os.path.exists('/proc/net/tcp'):
+            self.register('connections', self._collect_connections_proc, 'moderate', defaults={'active_connections': 0})
+        else:
+            self.register('connections', self._collect_connections, 'expensive', defaults={'active_connections': 0})
+        self.register('temperature', self._collect_temperature, 'expensive', defaults={'temperature': 0})
+
+        # Only cheap collectors run at construction; the rest run on the first background pass
+        self._snapshot = self.sample(max_cost='cheap')
+
+    def register(self, name, func, cost='cheap', interval=None, defaults=None):
+        """Add a collector; func returns a dict of snapshot fields"""
+        if cost not in COST_TIERS:
+            raise ValueError(f"cost must be one of {COST_TIERS}")
+        self.collectors[name] = Collector(name, func, cost, interval or self.tier_intervals[cost])
+        self._values.update(defaults or {})
+
+    def _collect_cpu(self):
+        return {'cpu': psutil.cpu_percent(interval=None)}
+
+    def _collect_memory(self):
+        return {'memory': psutil.virtual_memory().percent}
+
+    def _collect_disk(self):
+        return {'disk': psutil.disk_usage('/').percent}
+
+    def _collect_network(self):
+        net_io = psutil.net_io_counters()
+        total = net_io.bytes_sent + net_io.bytes_recv
+        now = time.monotonic()
+        network_speed = 0
+        if self._last_net and now > self._last_net[0]:
+            network_speed = round((total - self._last_net[1]) / (now - self._last_net[0]) / 1024, 1)
+        self._last_net = (now, total)
+        return {'network_speed': network_speed, 'bytes_sent': net_io.bytes_sent, 'bytes_recv': net_io.bytes_recv}
+
+    def _collect_connections_proc(self):
+        """ESTABLISHED TCP sockets (IPv4 and IPv6), read from the kernel's socket tables.
+
+        Not the CurrEstab counter in /proc/net/snmp, which also counts CLOSE-WAIT.
+        """
+        established = 0
+        for path in ('/proc/net/tcp', '/proc/net/tcp6'):
+            try:
+                with open(path) as f:
+                    next(f, None)  # Header
+                    # Fields: sl local_address rem_address st ...; st 01 is ESTABLISHED
+                    established += sum(1 for line in f if line.split(None, 4)[3] == '01')
+            except FileNotFoundError:
+                continue  # No IPv6
+        return {'active_connections': established}
+
+    def _collect_connections(self):
+        return {'active_connections': sum(1 for conn in psutil.net_connections(kind='tcp') if conn.status == 'ESTABLISHED')}
+
+    def _collect_temperature(self):
+        temps = psutil.sensors_temperatures() if hasattr(psutil, 'sensors_temperatures') else {}
+        readings = [entry.current for entries in temps.values() for entry in entries if entry.current]
+        return {'temperature': round(sum(readings) / len(readings), 1) if readings else 0}
+
+    def sample(self, max_cost='expensive'):
+        """Run the collectors that are due (up to max_cost) and return the merged sample"""
+        allowed = COST_TIERS[:COST_TIERS.index(max_cost) + 1]
+        now = time.monotonic()
+        for collector in list(self.collectors.values()):
+            if collector.cost in allowed and collector.next_due <= now:
+                values = collector.run()
+                if values:
+                    self._values.update(values)
+        return dict(self.static, **self._values, sampled_at=time.time())
+
+    def get_snapshot(self):
+        """Get the latest sample (never blocks)"""
+        return self._snapshot
+
+    def get_collector_stats(self):
+        """Get runtime statistics for every collector"""
+        return [collector.get_stats() for collector in self.collectors.values()]
+
+    def _sample_loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                # Replace the whole dict so readers never see a half-updated sample
+                self._snapshot = self.sample()
+            except Exception as e:
+                logger.error(f"System sampling failed: {e}")
+
+    def start(self):
+        """Start the sampler thread"""
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self._thread.start()
+
+# Global instance
+system_sampler = SystemSampler()
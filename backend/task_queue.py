@@ -0,0 +1,171 @@
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class _QueueStats:
+    """Counters and latency totals for one named queue"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    def to_dict(self):
+        finished = self.completed + self.failed
+        return {
+            'submitted': self.submitted,
+            'deduplicated': self.deduplicated,
+            'rejected': self.rejected,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_wait_ms': round(self.wait_total / finished * 1000, 2) if finished else None,
+            'max_wait_ms': round(self.wait_max * 1000, 2),
+            'avg_run_ms': round(self.run_total / finished * 1000, 2) if finished else None,
+            'max_run_ms': round(self.run_max * 1000, 2)
+        }
+
+class TaskQueue:
+    """Fixed pool of workers running background tasks from bounded, named queues"""
+
+    def __init__(self, workers=None, max_queue=None):
+        self.workers = workers or int(os.environ.get('BACKGROUND_WORKERS', '4'))
+        self.max_queue = max_queue or int(os.environ.get('BACKGROUND_QUEUE_LIMIT', '100'))
+        self._queues = {}  # name -> deque of (key, enqueued_at, func, args, kwargs)
+        self._stats = {}
+        self._pending = set()  # (queue, key) of tasks queued or delayed, for dedupe
+        self._delayed = []  # heap of (run_at, seq, queue, key, func, args, kwargs)
+        self._seq = itertools.count()
+        self._order = deque()  # queue names in round-robin order
+        self._running = 0
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _ensure_workers(self):
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'background-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _queue(self, name):
+        if name not in self._queues:
+            self._queues[name] = deque()
+            self._stats[name] = _QueueStats()
+            self._order.append(name)
+        return self._queues[name]
+
+    def _make_key(self, func, args, kwargs, key):
+        if key is not None:
+            return key
+        return (getattr(func, '__qualname__', repr(func)), repr(args), repr(sorted(kwargs.items())))
+
+    def _enqueue(self, queue, key, func, args, kwargs):
+        """Add a task to a queue (lock held); returns False if deduplicated or rejected"""
+        tasks = self._queue(queue)
+        stats = self._stats[queue]
+        if (queue, key) in self._pending:
+            stats.deduplicated += 1
+            return False
+        if len(tasks) >= self.max_queue:
+            stats.rejected += 1
+            logger.warning(f"Background queue '{queue}' is full; dropping task {key}")
+            return False
+        tasks.append((key, time.monotonic(), func, args, kwargs))
+        self._pending.add((queue, key))
+        stats.submitted += 1
+        self._cond.notify()
+        return True
+
+    def submit(self, queue, func, *args, key=None, **kwargs):
+        """Queue func(*args, **kwargs); identical pending tasks (same key) run once"""
+        with self._cond:
+            self._ensure_workers()
+            return self._enqueue(queue, self._make_key(func, args, kwargs, key), func, args, kwargs)
+
+    def submit_later(self, delay, queue, func, *args, key=None, **kwargs):
+        """Queue a task after `delay` seconds"""
+        with self._cond:
+            self._ensure_workers()
+            key = self._make_key(func, args, kwargs, key)
+            if (queue, key) in self._pending:
+                self._queue(queue)
+                self._stats[queue].deduplicated += 1
+                return False
+            self._pending.add((queue, key))
+            heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), queue, key, func, args, kwargs))
+            self._cond.notify()
+            return True
+
+    def _next_task(self):
+        """Block until a task is ready and take it (round-robin across queues)"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, _, queue, key, func, args, kwargs = heapq.heappop(self._delayed)
+                    self._pending.discard((queue, key))
+                    self._enqueue(queue, key, func, args, kwargs)
+
+                for _ in range(len(self._order)):
+                    queue = self._order[0]
+                    self._order.rotate(-1)
+                    if self._queues[queue]:
+                        key, enqueued_at, func, args, kwargs = self._queues[queue].popleft()
+                        self._pending.discard((queue, key))
+                        self._running += 1
+                        return queue, enqueued_at, func, args, kwargs
+
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._cond.wait(timeout)
+
+    def _worker(self):
+        while True:
+            queue, enqueued_at, func, args, kwargs = self._next_task()
+            started = time.monotonic()
+            failed = False
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                failed = True
+                logger.error(f"Background task in '{queue}' failed: {e}")
+            finished = time.monotonic()
+
+            with self._cond:
+                self._running -= 1
+                stats = self._stats[queue]
+                if failed:
+                    stats.failed += 1
+                else:
+                    stats.completed += 1
+                stats.wait_total += started - enqueued_at
+                stats.wait_max = max(stats.wait_max, started - enqueued_at)
+                stats.run_total += finished - started
+                stats.run_max = max(stats.run_max, finished - started)
+
+    def get_stats(self):
+        """Queue depths and task latency per queue"""
+        with self._cond:
+            return {
+                'workers': self.workers,
+                'running': self._running,
+                'delayed': len(self._delayed),
+                'queues': {
+                    name: dict(self._stats[name].to_dict(), depth=len(tasks), limit=self.max_queue)
+                    for name, tasks in self._queues.items()
+                }
+            }
+
+# Global instance
+task_queue = TaskQueue()
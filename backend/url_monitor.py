@@ -1,37 +1,86 @@
 import requests
 import time
 import logging
-import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
 from datetime import datetime
 from urllib.parse import urlparse
+from probe_engine import probe_engine
+from http_pool import http_pool
+from url_storage import create_url_storage
 
 logger = logging.getLogger(__name__)
 
-class URLMonitor:
+# Probe modes: 'head', 'stream' (GET, read at most PROBE_DRAIN_BYTES after the
+# headers), 'capped' (GET, read at most PROBE_BYTE_CAP bytes) and 'get' (full
+# download). Bodies that fit the cap are drained so the connection is reused.
+PROBE_MODES = ('head', 'stream', 'capped', 'get')
+PROBE_HEADERS = ('Content-Type', 'Content-Length', 'Server', 'Cache-Control', 'Location')
+
+# Bounds for per-URL check settings; jitter is a fraction of the interval
+MIN_CHECK_INTERVAL = float(os.environ.get('URL_MIN_CHECK_INTERVAL', '5'))
+MAX_JITTER = 0.5
+
+class _Flight:
+    """A probe in progress that other callers can wait on"""
     def __init__(self):
-        self.urls_file = 'monitored_urls.json'
-        self.monitored_urls = self.load_urls()
+        self.done = threading.Event()
+        self.result = None
+
+class URLMonitor:
+    def __init__(self, storage=None):
+        self.probe_mode = os.environ.get('PROBE_MODE', 'stream')
+        self.probe_byte_cap = int(os.environ.get('PROBE_BYTE_CAP', '65536'))
+        self.probe_drain_bytes = int(os.environ.get('PROBE_DRAIN_BYTES', '16384'))
+        self.storage = storage or create_url_storage()
+        self.scheduler = None  # Set by URLScheduler when background checks run
         
-    def load_urls(self):
-        """Load URLs from local file"""
-        if os.path.exists(self.urls_file):
-            try:
-                with open(self.urls_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {}
-    
-    def save_urls(self):
-        """Save URLs to local file"""
-        try:
-            with open(self.urls_file, 'w') as f:
-                json.dump(self.monitored_urls, f, indent=2, default=str)
-        except Exception as e:
-            logger.error(f"Failed to save URLs: {e}")
+        # Single-flight: concurrent or very recent checks of a URL share one probe
+        self.freshness_window = float(os.environ.get('SINGLE_FLIGHT_WINDOW', '2'))
+        self._flights = {}
+        self._recent = {}
+        self._recent_limit = 1024
+        self._flight_lock = threading.Lock()
+        self.heal_concurrency = int(os.environ.get('HEAL_CONCURRENCY', '8'))
         
-    def add_url(self, url, user_id="default"):
+        # Entries saved before URLs were scoped per user have user_id 'default';
+        # they go to URL_DEFAULT_OWNER, or else to the first user to ask for URLs
+        self.default_owner = os.environ.get('URL_DEFAULT_OWNER')
+        self._unowned_claimed = False
+        self._claim_lock = threading.Lock()
+    
+    def get_url(self, url, user_id=None):
+        """Get the monitored entry for a URL, or None (also None if user_id is given and doesn't own it)"""
+        url_data = self.storage.get(url)
+        if url_data and user_id is not None and url_data.get('user_id', 'default') != user_id:
+            return None
+        return url_data
+    
+    def claim_unowned(self, user_id):
+        """Assign entries still owned by 'default' to URL_DEFAULT_OWNER or to user_id (once per process)"""
+        if self._unowned_claimed:
+            return 0
+        with self._claim_lock:
+            if self._unowned_claimed:
+                return 0
+            owner = self.default_owner or user_id
+            claimed = 0
+            if owner and owner != 'default':
+                for url_data in self.storage.list('default'):
+                    if self.storage.update(url_data['url'], {'user_id': owner}):
+                        claimed += 1
+                if claimed:
+                    self.flush()
+                    logger.info(f"Assigned {claimed} monitored URLs without an owner to {owner}")
+            self._unowned_claimed = True
+            return claimed
+    
+    def flush(self):
+        """Write pending catalogue changes to storage"""
+        self.storage.flush()
+        
+    def add_url(self, url, user_id="default", interval=None, timeout=None, jitter=None, probe_mode=None):
         """Add URL to monitoring list"""
         try:
             # Validate URL
@@ -39,9 +88,18 @@ class URLMonitor:
             if not parsed.scheme:
                 url = "https://" + url
             
+            settings, error = self.validate_check_settings(interval, timeout, jitter)
+            if error:
+                return {'success': False, 'message': error}
+            
+            # URLs are keyed globally, so one user can't take over another's entry
+            existing = self.storage.get(url)
+            if existing and existing.get('user_id', 'default') != user_id:
+                return {'success': False, 'message': f'URL {url} is already monitored by another user'}
+            
             # Test URL first
             start_time = time.time()
-            response = requests.get(url, timeout=10)
+            response = http_pool.get(url, timeout=10)
             response_time = (time.time() - start_time) * 1000
             
             url_data = {
@@ -55,29 +113,162 @@ class URLMonitor:
                 'added_at': datetime.now().isoformat()
             }
             
+            # Optional per-URL check settings for the scheduler
+            url_data.update(settings)
+            if probe_mode in PROBE_MODES:
+                url_data['probe_mode'] = probe_mode
+            
             # Save to local storage
-            self.monitored_urls[url] = url_data
-            self.save_urls()
+            self.storage.put(url, url_data)
+            
+            if self.scheduler:
+                self.scheduler.schedule(url)
             
             return {'success': True, 'message': f'URL {url} added successfully'}
             
         except Exception as e:
             return {'success': False, 'message': f'Failed to add URL: {str(e)}'}
     
-    def check_url(self, url):
-        """Check single URL status"""
+    def validate_check_settings(self, interval=None, timeout=None, jitter=None):
+        """Parse optional per-URL check settings; returns (settings, error message or None)"""
+        settings = {}
+        for key, value in (('check_interval', interval), ('timeout', timeout), ('jitter', jitter)):
+            if value is None:
+                continue
+            try:
+                settings[key] = float(value)
+            except (TypeError, ValueError):
+                return None, f'{key} must be a number'
+        
+        if settings.get('check_interval', MIN_CHECK_INTERVAL) < MIN_CHECK_INTERVAL:
+            return None, f'check_interval must be at least {MIN_CHECK_INTERVAL:g} seconds'
+        if settings.get('timeout', 1) <= 0:
+            return None, 'timeout must be greater than 0'
+        if not 0 <= settings.get('jitter', 0) <= MAX_JITTER:
+            return None, f'jitter must be between 0 and {MAX_JITTER:g}'
+        return settings, None
+    
+    def get_probe_mode(self, url):
+        """Get the probe mode for a URL, honouring a known lack of HEAD support"""
+        url_data = self.storage.get(url) or {}
+        mode = url_data.get('probe_mode', self.probe_mode)
+        if mode == 'head' and url_data.get('head_supported') is False:
+            return 'get'
+        return mode if mode in PROBE_MODES else 'stream'
+    
+    def _send_probe(self, url, timeout, mode):
+        """Send a probe request without downloading more of the body than the mode allows"""
+        if mode == 'head':
+            response = http_pool.head(url, timeout=timeout, allow_redirects=True)
+            if response.status_code not in (405, 501):
+                return response
+            
+            # HEAD not supported: remember it and fall back to a full GET
+            self.storage.update(url, {'head_supported': False})
+            mode = 'get'
+        
+        if mode == 'get':
+            return http_pool.get(url, timeout=timeout, allow_redirects=True)
+        
+        response = http_pool.get(url, timeout=timeout, allow_redirects=True, stream=True)
+        cap = self.probe_byte_cap if mode == 'capped' else self.probe_drain_bytes
         try:
-            start_time = time.time()
-            response = requests.get(url, timeout=10, allow_redirects=True)
-            response_time = (time.time() - start_time) * 1000
+            body = response.raw.read(cap + 1, decode_content=False)
+        except Exception:
+            response.close()
+            raise
+        if len(body) <= cap:
+            # Whole body read: hand the connection back to the pool for reuse
+            response.raw.release_conn()
+        else:
+            # Larger than the cap: dropping the connection is cheaper than draining it
+            response.close()
+        return response
+    
+    def _phase_breakdown(self, phases, total, response=None):
+        """Build the per-phase timing breakdown (ms) for a probe"""
+        setup = phases['dns'] + phases['connect'] + phases['tls']
+        if response is not None:
+            # elapsed runs from sending the request until the headers are parsed
+            headers_at = sum((r.elapsed for r in response.history), response.elapsed).total_seconds()
+            ttfb = max(headers_at - setup, 0)
+            download = max(total - headers_at, 0)
+        else:
+            ttfb = download = 0
+        
+        return {
+            'dns': round(phases['dns'] * 1000, 2),
+            'connect': round(phases['connect'] * 1000, 2),
+            'tls': round(phases['tls'] * 1000, 2),
+            'ttfb': round(ttfb * 1000, 2),
+            'download': round(download * 1000, 2),
+            'total': round(total * 1000, 2),
+            'reused_connection': response is not None and phases['connect'] == 0
+        }
+    
+    def check_url(self, url, timeout=10, mode=None, fresh=False):
+        """Check single URL status, sharing in-flight and very recent probes of the same URL.
+        
+        fresh=True always sends a new probe (its result is still shared afterwards).
+        """
+        if fresh:
+            result = self._probe_url(url, timeout, mode)
+            with self._flight_lock:
+                self._remember(url, result)
+            return dict(result)
+        
+        with self._flight_lock:
+            recent = self._recent.get(url)
+            if recent and time.monotonic() - recent[0] < self.freshness_window:
+                return dict(recent[1])
+            
+            flight = self._flights.get(url)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[url] = flight
+        
+        if not leader:
+            flight.done.wait()
+            return dict(flight.result) if flight.result else self._probe_url(url, timeout, mode)
+        
+        try:
+            flight.result = self._probe_url(url, timeout, mode)
+        finally:
+            with self._flight_lock:
+                del self._flights[url]
+                if flight.result:
+                    self._remember(url, flight.result)
+            flight.done.set()
+        return dict(flight.result)
+    
+    def _remember(self, url, result):
+        """Cache a result for the freshness window, pruning expired entries as the cache grows"""
+        now = time.monotonic()
+        self._recent[url] = (now, result)
+        if len(self._recent) > self._recent_limit:
+            self._recent = {
+                key: entry for key, entry in self._recent.items()
+                if now - entry[0] < self.freshness_window
+            }
+            self._recent_limit = max(1024, 2 * len(self._recent))
+    
+    def _probe_url(self, url, timeout, mode):
+        """Probe a URL once"""
+        http_pool.start_timing()
+        start_time = time.perf_counter()
+        try:
+            response = self._send_probe(url, timeout, mode or self.get_probe_mode(url))
+            total = time.perf_counter() - start_time
             
             return {
                 'url': url,
                 'status_code': response.status_code,
-                'response_time': round(response_time, 2),
+                'response_time': round(total * 1000, 2),
                 'is_online': response.status_code == 200,
-                'headers': dict(response.headers),
+                'headers': {h: response.headers[h] for h in PROBE_HEADERS if h in response.headers},
                 'final_url': response.url,
+                'timings': self._phase_breakdown(http_pool.stop_timing(), total, response),
                 'checked_at': datetime.now().isoformat()
             }
             
@@ -85,9 +276,10 @@ class URLMonitor:
             return {
                 'url': url,
                 'status_code': 0,
-                'response_time': 10000,
+                'response_time': timeout * 1000,
                 'is_online': False,
                 'error': 'Timeout',
+                'timings': self._phase_breakdown(http_pool.stop_timing(), time.perf_counter() - start_time),
                 'checked_at': datetime.now().isoformat()
             }
         except Exception as e:
@@ -97,23 +289,32 @@ class URLMonitor:
                 'response_time': 0,
                 'is_online': False,
                 'error': str(e),
+                'timings': self._phase_breakdown(http_pool.stop_timing(), time.perf_counter() - start_time),
                 'checked_at': datetime.now().isoformat()
             }
     
-    def get_monitored_urls(self, user_id="default"):
-        """Get all monitored URLs for user"""
+    def get_monitored_urls(self, user_id=None):
+        """Get monitored URLs, for one user or (user_id=None) for all users"""
         try:
-            return list(self.monitored_urls.values())
+            return self.storage.list(user_id)
         except Exception as e:
             logger.error(f"Failed to get monitored URLs: {e}")
             return []
     
-    def remove_url(self, url, user_id="default"):
-        """Remove URL from monitoring"""
+    def get_offline_urls(self, user_id=None):
+        """Get monitored URLs whose last check failed"""
+        try:
+            return self.storage.list(user_id, is_online=False)
+        except Exception as e:
+            logger.error(f"Failed to get offline URLs: {e}")
+            return []
+    
+    def remove_url(self, url, user_id=None):
+        """Remove URL from monitoring (only the owner's entry when user_id is given)"""
         try:
-            if url in self.monitored_urls:
-                del self.monitored_urls[url]
-                self.save_urls()
+            if self.get_url(url, user_id) is not None and self.storage.delete(url):
+                if self.scheduler:
+                    self.scheduler.unschedule(url)
                 return {'success': True, 'message': 'URL removed successfully'}
             else:
                 return {'success': False, 'message': 'URL not found'}
@@ -121,30 +322,109 @@ class URLMonitor:
         except Exception as e:
             return {'success': False, 'message': f'Failed to remove URL: {str(e)}'}
     
-    def check_all_urls(self, user_id="default"):
-        """Check all monitored URLs"""
-        urls = self.get_monitored_urls(user_id)
-        results = []
+    def record_result(self, url, result):
+        """Store the outcome of a check on the monitored entry"""
+        try:
+            self.storage.update(url, {
+                'last_check': datetime.now().isoformat(),
+                'response_time': result['response_time'],
+                'status_code': result['status_code'],
+                'is_online': result['is_online'],
+                'timings': result.get('timings')
+            })
+        except Exception as e:
+            logger.error(f"Failed to update URL status: {e}")
+    
+    def get_url_variants(self, url):
+        """Candidate URLs to try when healing, most preferred first"""
+        variants = [url]
+        if url.startswith('https://'):
+            variants.append(url.replace('https://', 'http://', 1))
+            if not url.startswith('https://www.'):
+                variants.append(url.replace('https://', 'https://www.', 1))
+        return variants
+    
+    def find_healthy_variant(self, url, timeout=10):
+        """Probe all variants of a URL concurrently and return (healthy_url, result).
         
-        for url_data in urls:
-            result = self.check_url(url_data['url'])
-            
-            # Update local storage
-            try:
-                if url_data['url'] in self.monitored_urls:
-                    self.monitored_urls[url_data['url']].update({
-                        'last_check': datetime.now().isoformat(),
-                        'response_time': result['response_time'],
-                        'status_code': result['status_code'],
-                        'is_online': result['is_online']
-                    })
-                    self.save_urls()
-            except Exception as e:
-                logger.error(f"Failed to update URL status: {e}")
-            
-            results.append(result)
+        Returns as soon as the most preferred healthy variant is known; the
+        remaining probes are cancelled or left to finish unobserved.
+        """
+        candidates = self.get_url_variants(url)
+        futures = {probe_engine.submit(self.check_url, candidate, timeout): candidate for candidate in candidates}
+        results = {}
+        try:
+            for future in as_completed(futures, timeout=timeout + 5):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    logger.error(f"Variant probe failed for {futures[future]}: {e}")
+                    results[futures[future]] = {'url': futures[future], 'is_online': False, 'status_code': 0}
+                
+                # Walk candidates in preference order; stop at the first unanswered one
+                for candidate in candidates:
+                    result = results.get(candidate)
+                    if result is None:
+                        break
+                    if result['is_online']:
+                        return candidate, result
+        except FutureTimeout:
+            logger.warning(f"Variant probes for {url} timed out")
+        finally:
+            for future in futures:
+                future.cancel()
+        
+        return None, results.get(url) or {'url': url, 'is_online': False, 'status_code': 0, 'error': 'Timeout'}
+    
+    def move_url(self, url, new_url, result):
+        """Re-key a monitored entry to a new URL, keeping its owner and check settings"""
+        url_data = self.storage.get(url) or {'url': url, 'user_id': 'default', 'added_at': datetime.now().isoformat()}
+        self.remove_url(url)
+        if self.storage.get(new_url) is None:
+            moved = dict(url_data, url=new_url)
+            moved.pop('head_supported', None)  # Learned for the old URL only
+            self.storage.put(new_url, moved)
+        self.record_result(new_url, result)
+        if self.scheduler:
+            self.scheduler.schedule(new_url)
+    
+    def heal_url(self, url):
+        """Find a reachable variant of a URL and move monitoring to it.
+        
+        Returns (healed_url or None, result, actions).
+        """
+        healed_url, result = self.find_healthy_variant(url)
+        actions = [f"Probed {len(self.get_url_variants(url))} URL variants concurrently"]
+        
+        if healed_url == url:
+            self.record_result(url, result)
+        elif healed_url:
+            actions.append("Switched to HTTP protocol" if healed_url.startswith('http://') else "Added www prefix")
+            self.move_url(url, healed_url, result)
+        
+        actions.append(f"Final status: {result.get('status_code', 0)}")
+        return healed_url, result, actions
+    
+    def heal_urls(self, urls):
+        """Heal several URLs in parallel, returning (url, healed_url, result, actions) per URL"""
+        if not urls:
+            return []
+        # Own pool: heal_url waits on probe engine futures, so it must not run on the engine
+        with ThreadPoolExecutor(max_workers=min(self.heal_concurrency, len(urls))) as pool:
+            return [(url,) + healed for url, healed in zip(urls, pool.map(self.heal_url, urls))]
+    
+    def check_all_urls(self, user_id=None):
+        """Check all monitored URLs concurrently"""
+        urls = [url_data['url'] for url_data in self.get_monitored_urls(user_id)]
+        results = probe_engine.map(self.check_url, urls)
+        
+        for url, result in zip(urls, results):
+            if result is not None:
+                self.record_result(url, result)
         
-        return results
+        # One write per sweep instead of one per URL
+        self.flush()
+        return [result for result in results if result is not None]
 
 # Global instance
 url_monitor = URLMonitor()
\ No newline at end of file
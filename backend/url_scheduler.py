@@ -0,0 +1,191 @@
+import os
+import time
+import heapq
+import random
+import logging
+import threading
+from urllib.parse import urlparse
+from url_monitor import url_monitor, MIN_CHECK_INTERVAL, MAX_JITTER
+from probe_engine import probe_engine
+from dns_cache import dns_cache
+
+logger = logging.getLogger(__name__)
+
+class AdaptiveCadence:
+    """Chooses each target's next probe interval from its recent stability"""
+
+    def __init__(self, min_interval=None, max_backoff=None, backoff=None, confirm_count=None, slow_ms=None,
+                 max_interval=None):
+        self.min_interval = min_interval or float(os.environ.get('PROBE_MIN_INTERVAL', '3'))
+        # Longest interval for a stable target, as a multiple of its base interval
+        self.max_backoff = max_backoff or float(os.environ.get('PROBE_MAX_BACKOFF', '10'))
+        # ...and in seconds. A new outage can go unnoticed this long, so this is
+        # the worst-case detection delay traded for the lower probe volume
+        self.max_interval = max_interval or float(os.environ.get('PROBE_MAX_INTERVAL', '60'))
+        self.backoff = backoff or float(os.environ.get('PROBE_BACKOFF', '1.5'))
+        self.confirm_count = confirm_count or int(os.environ.get('PROBE_CONFIRM_COUNT', '3'))
+        self.slow_ms = slow_ms or float(os.environ.get('PROBE_SLOW_MS', '2000'))
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def next_interval(self, key, result, base_interval):
+        """Record a probe result and return how long to wait before the next one"""
+        is_online = result['is_online']
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                # New targets are assumed up, so a first failure is confirmed quickly
+                state = {'interval': base_interval, 'online': True, 'streak': self.confirm_count, 'flap_score': 0.0}
+                self._states[key] = state
+
+            # Decaying count of recent up/down transitions
+            changed = state['online'] != is_online
+            state['flap_score'] = state['flap_score'] * 0.5 + (1 if changed else 0)
+            state['streak'] = 1 if changed else state['streak'] + 1
+            state['online'] = is_online
+
+            if changed or state['flap_score'] >= 0.75 or state['streak'] < self.confirm_count:
+                # Just failed, just recovered or flapping: probe fast until the state is confirmed
+                state['interval'] = min(self.min_interval, base_interval)
+            elif not is_online or result.get('response_time', 0) > self.slow_ms:
+                # Confirmed down or slow: hold the normal cadence
+                state['interval'] = base_interval
+            else:
+                # Stable: back off towards the maximum (never slower than the base cadence itself)
+                ceiling = max(base_interval, min(base_interval * self.max_backoff, self.max_interval))
+                state['interval'] = min(max(state['interval'], base_interval) * self.backoff, ceiling)
+
+            return state['interval']
+
+    def forget(self, key):
+        """Drop the state kept for a target"""
+        with self._lock:
+            self._states.pop(key, None)
+
+    def get_state(self, key):
+        """Get a copy of the state kept for a target"""
+        with self._lock:
+            state = self._states.get(key)
+            return dict(state) if state else None
+
+class URLScheduler:
+    """Checks each monitored URL on its own interval, ordered by next-due time"""
+
+    def __init__(self, monitor, engine):
+        self.monitor = monitor
+        self.engine = engine
+        self.default_interval = float(os.environ.get('URL_CHECK_INTERVAL', '60'))
+        self.default_timeout = float(os.environ.get('URL_CHECK_TIMEOUT', '10'))
+        self.default_jitter = float(os.environ.get('URL_CHECK_JITTER', '0.1'))
+        self.on_result = None
+        self.cadence = AdaptiveCadence() if os.environ.get('PROBE_CADENCE', 'fixed') == 'adaptive' else None
+
+        # Heap of (due, url); _due holds the live due time per URL so that
+        # rescheduled or removed entries are skipped when popped
+        self._heap = []
+        self._due = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+        monitor.scheduler = self
+
+    def get_check_config(self, url):
+        """Get interval, timeout and jitter for a URL"""
+        url_data = self.monitor.get_url(url) or {}
+        interval = url_data.get('check_interval') or self.default_interval
+        timeout = url_data.get('timeout') or self.default_timeout
+        jitter = url_data.get('jitter', self.default_jitter)
+        # Clamp values saved before settings were validated, so no URL is checked in a tight loop
+        return (
+            max(interval, MIN_CHECK_INTERVAL),
+            timeout if timeout > 0 else self.default_timeout,
+            min(max(jitter, 0), MAX_JITTER)
+        )
+
+    def schedule(self, url, delay=None):
+        """Schedule the next check of a URL"""
+        if delay is None:
+            # New targets start at a random point in their interval so checks spread out
+            interval, _, _ = self.get_check_config(url)
+            delay = random.uniform(0, interval)
+
+        with self._cond:
+            due = time.monotonic() + max(delay, 0)
+            self._due[url] = due
+            heapq.heappush(self._heap, (due, url))
+            self._cond.notify()
+
+    def unschedule(self, url):
+        """Stop checking a URL"""
+        with self._cond:
+            self._due.pop(url, None)
+        if self.cadence:
+            self.cadence.forget(url)
+
+    def start(self):
+        """Schedule all monitored URLs and start the dispatch thread"""
+        if self._thread:
+            return
+        urls = [url_data['url'] for url_data in self.monitor.get_monitored_urls()]
+        
+        # Warm the DNS cache for every target in one concurrent batch
+        dns_cache.resolve_many(urlparse(url).hostname for url in urls if urlparse(url).hostname)
+        
+        for url in urls:
+            self.schedule(url)
+        self._thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._thread.start()
+        logger.info(f"URL scheduler started with {len(self._due)} targets")
+
+    def _next_due(self):
+        """Block until a URL is due, then return it"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    due, url = heapq.heappop(self._heap)
+                    if self._due.get(url) == due:
+                        return url
+                    continue  # Stale entry
+                timeout = self._heap[0][0] - now if self._heap else None
+                self._cond.wait(timeout)
+
+    def _dispatch_loop(self):
+        while True:
+            url = self._next_due()
+            try:
+                self.engine.submit(self._check, url)
+            except Exception as e:
+                logger.error(f"Failed to dispatch check for {url}: {e}")
+                self.schedule(url, self.default_interval)
+
+    def _check(self, url):
+        """Check a URL, store the result and schedule its next check"""
+        interval, timeout, jitter = self.get_check_config(url)
+        try:
+            result = self.monitor.check_url(url, timeout=timeout)
+            self.monitor.record_result(url, result)
+            if self.cadence:
+                interval = self.cadence.next_interval(url, result, interval)
+            if self.on_result:
+                self.on_result(result)
+        except Exception as e:
+            logger.error(f"Scheduled check failed for {url}: {e}")
+        finally:
+            with self._cond:
+                still_scheduled = url in self._due
+            if still_scheduled:
+                self.schedule(url, interval * (1 + random.uniform(-jitter, jitter)))
+
+    def get_stats(self):
+        """Get scheduler statistics"""
+        with self._cond:
+            next_due = self._heap[0][0] - time.monotonic() if self._heap else None
+            return {
+                'targets': len(self._due),
+                'heap_size': len(self._heap),
+                'next_check_in': round(max(next_due, 0), 2) if next_due is not None else None
+            }
+
+# Global instance
+url_scheduler = URLScheduler(url_monitor, probe_engine)
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class JSONURLStorage:
+    """Default backend: the whole catalogue in one JSON file, written behind"""
+
+    def __init__(self, path='monitored_urls.json', flush_interval=5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._urls = self._load()
+
+        # Write-behind: changes are flushed periodically and once more on shutdown
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+        atexit.register(self.flush)
+
+    def _load(self):
+        """Load URLs from the JSON file"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {}
+
+    def save(self):
+        """Atomically write the catalogue to disk"""
+        with self._write_lock:
+            with self._lock:
+                data = json.dumps(self._urls, indent=2, default=str)
+                self._dirty = False
+
+            tmp_file = f"{self.path}.tmp"
+            try:
+                with open(tmp_file, 'w') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.path)
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                logger.error(f"Failed to save URLs: {e}")
+
+    def flush(self):
+        """Write pending changes to disk, if any"""
+        if self._dirty:
+            self.save()
+
+    def _flush_loop(self):
+        """Flush pending changes every flush_interval seconds"""
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def get(self, url):
+        with self._lock:
+            url_data = self._urls.get(url)
+            return dict(url_data) if url_data else None
+
+    def put(self, url, url_data):
+        with self._lock:
+            self._urls[url] = dict(url_data)
+            self._dirty = True
+
+    def update(self, url, fields):
+        with self._lock:
+            if url not in self._urls:
+                return False
+            self._urls[url].update(fields)
+            self._dirty = True
+            return True
+
+    def delete(self, url):
+        with self._lock:
+            if self._urls.pop(url, None) is None:
+                return False
+            self._dirty = True
+            return True
+
+    def list(self, user_id=None, is_online=None):
+        """List URLs, optionally filtered by owner and online state"""
+        with self._lock:
+            return [
+                dict(url_data) for url_data in self._urls.values()
+                if (user_id is None or url_data.get('user_id', 'default') == user_id)
+                and (is_online is None or url_data.get('is_online', True) == is_online)
+            ]
+
+class SQLiteURLStorage:
+    """Embedded SQLite backend (WAL mode) with indexed lookups"""
+
+    SCHEMA = [
+        '''CREATE TABLE IF NOT EXISTS urls (
+            url TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            status TEXT,
+            is_online INTEGER NOT NULL,
+            last_check TEXT,
+            data TEXT NOT NULL
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_urls_user_online ON urls (user_id, is_online)',
+        'CREATE INDEX IF NOT EXISTS idx_urls_online ON urls (is_online)',
+        'CREATE INDEX IF NOT EXISTS idx_urls_status ON urls (status)',
+        'CREATE INDEX IF NOT EXISTS idx_urls_last_check ON urls (last_check)'
+    ]
+
+    def __init__(self, path='monitored_urls.db'):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+
+    def _conn(self):
+        """Get this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _row(self, url, url_data):
+        return (
+            url,
+            url_data.get('user_id', 'default'),
+            url_data.get('status'),
+            1 if url_data.get('is_online', True) else 0,
+            url_data.get('last_check'),
+            json.dumps(url_data, default=str)
+        )
+
+    def flush(self):
+        """Writes are committed immediately; nothing to flush"""
+        pass
+
+    def get(self, url):
+        row = self._conn().execute('SELECT data FROM urls WHERE url = ?', (url,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, url, url_data):
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute('INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?)', self._row(url, url_data))
+            conn.commit()
+
+    def update(self, url, fields):
+        with self._write_lock:
+            conn = self._conn()
+            row = conn.execute('SELECT data FROM urls WHERE url = ?', (url,)).fetchone()
+            if not row:
+                return False
+            url_data = json.loads(row[0])
+            url_data.update(fields)
+            conn.execute('INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?)', self._row(url, url_data))
+            conn.commit()
+            return True
+
+    def delete(self, url):
+        with self._write_lock:
+            conn = self._conn()
+            deleted = conn.execute('DELETE FROM urls WHERE url = ?', (url,)).rowcount
+            conn.commit()
+            return deleted > 0
+
+    def list(self, user_id=None, is_online=None):
+        """List URLs, optionally filtered by owner and online state"""
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append('user_id = ?')
+            params.append(user_id)
+        if is_online is not None:
+            clauses.append('is_online = ?')
+            params.append(1 if is_online else 0)
+
+        query = 'SELECT data FROM urls'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        return [json.loads(row[0]) for row in self._conn().execute(query, params)]
+
+def create_url_storage():
+    """Create the storage backend selected by URL_STORAGE_BACKEND"""
+    backend = os.environ.get('URL_STORAGE_BACKEND', 'json').lower()
+    if backend == 'sqlite':
+        return SQLiteURLStorage(os.environ.get('URL_STORAGE_PATH', 'monitored_urls.db'))
+    return JSONURLStorage(
+        os.environ.get('URL_STORAGE_PATH', 'monitored_urls.json'),
+        float(os.environ.get('URL_FLUSH_INTERVAL', '5'))
+    )
@@ -1,5 +1,7 @@
-from flask_socketio import emit
+from flask_socketio import emit, join_room, leave_room
+from flask_jwt_extended import decode_token
 from datetime import datetime
+from metric_stream import metric_stream, LEGACY_ROOM
 
 def add_real_time_log(socketio, metrics_data, message, level='info'):
     """Add real-time log entry"""
@@ -8,11 +10,24 @@ def add_real_time_log(socketio, metrics_data, message, level='info'):
         'level': level,
         'message': message
     }
-    metrics_data['real_time_logs'].append(log_entry)
-    metrics_data['real_time_logs'] = metrics_data['real_time_logs'][-100:]  # Keep last 100
+    metrics_data.append('real_time_logs', log_entry, limit=100)  # Keep last 100
     
-    # Emit to connected clients
-    socketio.emit('new_log', log_entry)
+    # Emit to clients not on the metric stream (stream clients get it in the next frame)
+    socketio.emit('new_log', log_entry, to=LEGACY_ROOM)
+
+def user_room(user_id):
+    """Room holding one user's authenticated sockets, for events about that user's URLs"""
+    return f"user:{user_id}"
+
+def socket_identity(auth):
+    """The user named by the JWT a client passed as auth.token on connect, or None"""
+    token = (auth or {}).get('token') if isinstance(auth, dict) else None
+    if not token:
+        return None
+    try:
+        return decode_token(token).get('sub')
+    except Exception:
+        return None
 
 def calculate_health_score(metrics_data):
     """Calculate overall deployment health score"""
@@ -32,25 +47,68 @@ def calculate_health_score(metrics_data):
     
     return max(0, score)
 
-def setup_websocket_handlers(socketio, metrics_data):
+def setup_websocket_handlers(socketio, metrics_data, deployments=None):
     """Setup WebSocket event handlers"""
     
     @socketio.on('connect')
-    def handle_connect():
-        metrics_data['active_users'] += 1
+    def handle_connect(auth=None):
+        metrics = metrics_data.apply('active_users', lambda users: users + 1)
+        join_room(LEGACY_ROOM)
+        # Per-user events only reach sockets that connected with a valid token
+        identity = socket_identity(auth)
+        if identity:
+            join_room(user_room(identity))
         emit('connected', {'message': 'Connected to real-time monitoring'})
-        add_real_time_log(socketio, metrics_data, f"New user connected - Active users: {metrics_data['active_users']}", 'info')
+        add_real_time_log(socketio, metrics_data, f"New user connected - Active users: {metrics['active_users']}", 'info')
 
     @socketio.on('disconnect')
     def handle_disconnect():
-        metrics_data['active_users'] = max(0, metrics_data['active_users'] - 1)
-        add_real_time_log(socketio, metrics_data, f"User disconnected - Active users: {metrics_data['active_users']}", 'info')
+        metrics = metrics_data.apply('active_users', lambda users: max(0, users - 1))
+        add_real_time_log(socketio, metrics_data, f"User disconnected - Active users: {metrics['active_users']}", 'info')
 
     @socketio.on('request_status')
     def handle_status_request():
+        metrics = metrics_data.snapshot()
         emit('status_update', {
-            'status': metrics_data['status'],
-            'health_score': metrics_data['deployment_health_score'],
-            'active_users': metrics_data['active_users'],
+            'status': metrics['status'],
+            'health_score': metrics['deployment_health_score'],
+            'active_users': metrics['active_users'],
             'timestamp': datetime.now().isoformat()
-        })
\ No newline at end of file
+        })
+
+    @socketio.on('subscribe')
+    def handle_subscribe(data):
+        """Receive 'deployment_update' events for one deployment"""
+        name = (data or {}).get('deployment')
+        deployment = deployments.get(name) if deployments else None
+        if deployment is None:
+            emit('subscription_error', {'deployment': name, 'message': 'Unknown deployment'})
+            return
+        join_room(deployment.room)
+        emit('subscribed', {'deployment': name, 'state': deployment.to_dict()})
+
+    @socketio.on('unsubscribe')
+    def handle_unsubscribe(data):
+        name = (data or {}).get('deployment')
+        deployment = deployments.get(name) if deployments else None
+        if deployment is not None:
+            leave_room(deployment.room)
+        emit('unsubscribed', {'deployment': name})
+
+    @socketio.on('stream_subscribe')
+    def handle_stream_subscribe(data):
+        """Switch from full 'metrics_update' events to the delta stream, starting with a keyframe"""
+        fmt = metric_stream.resolve_format((data or {}).get('format'))
+        leave_room(LEGACY_ROOM)
+        for other in metric_stream.formats():
+            if other != fmt:
+                leave_room(metric_stream.room(other))
+        join_room(metric_stream.room(fmt))
+        metric_stream.send_keyframe(emit, fmt)
+
+    @socketio.on('stream_unsubscribe')
+    def handle_stream_unsubscribe():
+        for fmt in metric_stream.formats():
+            leave_room(metric_stream.room(fmt))
+        join_room(LEGACY_ROOM)
+        emit('stream_unsubscribed', {})
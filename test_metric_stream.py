@@ -0,0 +1,137 @@
+"""
+Tests for the delta-encoded metric stream
+"""
+
+import pytest
+
+import metric_stream as stream_module
+from metric_stream import MetricStream
+
+
+class FakeSocketIO:
+    """Records broadcasts instead of sending them"""
+
+    def __init__(self):
+        self.sent = []
+
+    def emit(self, event, data, to=None):
+        self.sent.append((event, data, to))
+
+
+class StreamClient:
+    """A client following the documented protocol: apply deltas whose base is the last seq"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.seq = None
+        self.fields = {}
+        self.logs = []
+        self.resyncs = 0
+
+    def subscribe(self):
+        self.stream.send_keyframe(self.on_keyframe_event, 'json')
+
+    def on_keyframe_event(self, event, frame):
+        assert event == 'metrics_keyframe'
+        self.seq = frame['seq']
+        self.fields = dict(frame['fields'])
+        self.logs = list(frame['logs'])
+
+    def on_delta(self, frame):
+        if self.seq is None or frame['seq'] <= self.seq:
+            return
+        if frame['base'] != self.seq:
+            self.resyncs += 1
+            self.subscribe()
+            return
+        self.seq = frame['seq']
+        self.fields.update(frame.get('set', {}))
+        for key in frame.get('unset', []):
+            del self.fields[key]
+        self.logs.extend(frame.get('logs', []))
+
+
+def test_deltas_carry_only_changes_and_chain_by_seq():
+    stream, socketio = MetricStream(), FakeSocketIO()
+
+    first = stream.publish(socketio, {'cpu': 1.0, 'status': 'Online'})
+    assert first['seq'] == 1 and first['base'] == 0
+    assert first['set'] == {'cpu': 1.0, 'status': 'Online'}
+
+    second = stream.publish(socketio, {'cpu': 2.0, 'status': 'Online'})
+    assert (second['seq'], second['base']) == (2, 1)
+    assert second['set'] == {'cpu': 2.0}
+
+    third = stream.publish(socketio, {'cpu': 2.0})
+    assert third['unset'] == ['status'] and 'set' not in third
+
+    # Nothing changed: no frame, and seq does not advance
+    assert stream.publish(socketio, {'cpu': 2.0}) is None
+    assert stream.publish(socketio, {'cpu': 3.0})['base'] == 3
+
+    # One broadcast per frame and format
+    json_frames = [(event, data) for event, data, to in socketio.sent if to == stream.room('json')]
+    assert [event for event, _ in json_frames] == ['metrics_delta'] * 4
+    assert len(socketio.sent) == 4 * len(stream.formats())
+
+
+def test_logs_are_coalesced_into_the_next_frame():
+    stream, socketio = MetricStream(), FakeSocketIO()
+    logs = ({'message': 'a'},)
+    stream.publish(socketio, {'cpu': 1.0}, logs)
+
+    # Two entries written between ticks arrive together, and only once
+    logs = logs + ({'message': 'b'}, {'message': 'c'})
+    frame = stream.publish(socketio, {'cpu': 1.0}, logs)
+    assert [entry['message'] for entry in frame['logs']] == ['b', 'c']
+    assert 'set' not in frame
+    assert stream.publish(socketio, {'cpu': 1.0}, logs) is None
+
+
+def test_log_tail_is_sent_when_the_last_seen_entry_was_trimmed():
+    stream, socketio = MetricStream(), FakeSocketIO()
+    stream.keyframe_logs = 2
+    stream.publish(socketio, {}, ({'message': 'old'},))
+
+    frame = stream.publish(socketio, {}, tuple({'message': str(i)} for i in range(5)))
+    assert [entry['message'] for entry in frame['logs']] == ['3', '4']
+
+
+def test_client_state_matches_server_and_gaps_trigger_a_keyframe():
+    stream, socketio = MetricStream(), FakeSocketIO()
+    first = stream.publish(socketio, {'cpu': 1.0, 'memory': 10.0})
+
+    client = StreamClient(stream)
+    client.subscribe()
+    assert client.seq == 1 and client.fields == {'cpu': 1.0, 'memory': 10.0}
+
+    # A delta already covered by the keyframe is ignored
+    client.on_delta(first)
+    assert client.seq == 1
+
+    delivered = stream.publish(socketio, {'cpu': 2.0, 'memory': 10.0})
+    client.on_delta(delivered)
+    stream.publish(socketio, {'cpu': 3.0, 'memory': 11.0})  # Lost in transit
+    after_gap = stream.publish(socketio, {'cpu': 3.0, 'memory': 12.0})
+
+    client.on_delta(after_gap)
+    assert client.resyncs == 1
+    assert client.seq == after_gap['seq']
+    assert client.fields == {'cpu': 3.0, 'memory': 12.0}
+
+
+def test_unsupported_format_falls_back_to_json(monkeypatch):
+    monkeypatch.setattr(stream_module, 'msgpack', None)
+    stream = MetricStream()
+    assert stream.formats() == ('json',)
+    assert stream.resolve_format('msgpack') == 'json'
+
+
+def test_msgpack_frames_decode_to_the_json_frame():
+    msgpack = pytest.importorskip('msgpack')
+    stream, socketio = MetricStream(), FakeSocketIO()
+    frame = stream.publish(socketio, {'cpu': 1.5}, ({'message': 'x'},))
+
+    binary = [data for _, data, to in socketio.sent if to == stream.room('msgpack')]
+    assert len(binary) == 1 and isinstance(binary[0], bytes)
+    assert msgpack.unpackb(binary[0]) == frame
@@ -0,0 +1,76 @@
+"""
+Tests for the sliding-window aggregates of MetricsHistory
+"""
+
+import random
+
+import pytest
+
+from metrics_history import WINDOWS, MetricsHistory
+
+
+def brute_force(samples, now, seconds, capacity):
+    """Aggregates computed directly from the samples still inside a window"""
+    kept = [s for s in samples[-capacity:] if s['timestamp'] > now - seconds]
+    if not kept:
+        return {'samples': 0, 'uptime_percentage': None, 'incidents': 0}
+    online = sum(s['online'] for s in kept)
+    result = {
+        'samples': len(kept),
+        'uptime_percentage': round(online / len(kept) * 100, 2),
+        'incidents': len(kept) - online
+    }
+    for field in ('latency', 'cpu', 'memory'):
+        values = [s[field] for s in kept]
+        result[f'avg_{field}'] = round(sum(values) / len(values), 2)
+        result[f'min_{field}'] = round(min(values), 2)
+        result[f'max_{field}'] = round(max(values), 2)
+    return result
+
+
+@pytest.mark.parametrize('capacity', [40, 5000])
+def test_window_aggregates_match_brute_force(capacity):
+    rng = random.Random(capacity)
+    history = MetricsHistory(capacity=capacity)
+    samples = []
+    now = 1_000_000.0
+
+    for _ in range(1500):
+        # Irregular gaps, including long ones, so every window both fills and expires
+        now += rng.choice((1, 3, 3, 3, 30, 400, 5000))
+        sample = {
+            'timestamp': now,
+            'online': rng.random() > 0.2,
+            'latency': round(rng.uniform(0, 3000), 1),
+            'cpu': round(rng.uniform(0, 100), 1),
+            'memory': round(rng.uniform(0, 100), 1)
+        }
+        samples.append(sample)
+        history.append(sample['online'], sample['latency'], sample['cpu'], sample['memory'], timestamp=now)
+
+        for name, seconds in WINDOWS.items():
+            expected = brute_force(samples, now, seconds, capacity)
+            actual = history.aggregate(name)
+            assert actual.keys() == expected.keys()
+            for key, value in expected.items():
+                assert actual[key] == pytest.approx(value, abs=0.011), (name, key)
+
+
+def test_capacity_and_retention_bound_the_buffer():
+    history = MetricsHistory(capacity=10, retention=100)
+    for i in range(25):
+        history.append(True, i, 0, 0, timestamp=1000 + i)
+    assert len(history) == 10
+    assert [s['latency'] for s in history.tail(3)] == [22, 23, 24]
+
+    # A sample far in the future expires everything older than the retention
+    history.append(False, 99, 0, 0, timestamp=5000)
+    assert len(history) == 1
+    assert history.aggregate('7d')['samples'] == 1
+
+
+def test_windows_longer_than_the_retention_are_left_out():
+    history = MetricsHistory(capacity=100, retention=86400)
+    history.append(True, 10, 0, 0, timestamp=1000)
+
+    assert set(history.aggregates()) == {'5m', '1h', '24h'}
@@ -0,0 +1,97 @@
+"""
+Tests for the bounded background task queue
+"""
+
+import threading
+import time
+
+from task_queue import TaskQueue
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not met in time'
+        time.sleep(0.005)
+
+
+def blocked_queue(max_queue):
+    """A one-worker queue whose worker is held by a task until the returned event is set"""
+    queue = TaskQueue(workers=1, max_queue=max_queue)
+    started, release = threading.Event(), threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(2)
+
+    queue.submit('work', blocker, key='blocker')
+    assert started.wait(2)
+    return queue, release
+
+
+def test_identical_pending_tasks_run_once():
+    queue, release = blocked_queue(max_queue=10)
+    runs = []
+
+    assert queue.submit('work', runs.append, 'x', key='same') is True
+    assert queue.submit('work', runs.append, 'x', key='same') is False
+    # Without an explicit key, the function and arguments are the key
+    assert queue.submit('work', runs.append, 'y') is True
+    assert queue.submit('work', runs.append, 'y') is False
+
+    release.set()
+    wait_for(lambda: queue.get_stats()['queues']['work']['completed'] == 3)
+    assert sorted(runs) == ['x', 'y']
+    assert queue.get_stats()['queues']['work']['deduplicated'] == 2
+
+
+def test_key_can_be_resubmitted_once_its_task_is_running():
+    queue = TaskQueue(workers=1, max_queue=10)
+    started, release = threading.Event(), threading.Event()
+
+    def task():
+        started.set()
+        release.wait(2)
+
+    assert queue.submit('work', task, key='k')
+    assert started.wait(2)
+    assert queue.submit('work', task, key='k') is True
+    release.set()
+
+
+def test_full_queue_rejects_tasks():
+    queue, release = blocked_queue(max_queue=2)
+
+    assert queue.submit('work', time.sleep, 0, key=1)
+    assert queue.submit('work', time.sleep, 0, key=2)
+    assert queue.submit('work', time.sleep, 0, key=3) is False
+
+    stats = queue.get_stats()['queues']['work']
+    assert stats['rejected'] == 1
+    assert stats['depth'] == 2
+
+    # Other queues have their own limit
+    assert queue.submit('other', time.sleep, 0, key=1)
+    release.set()
+
+
+def test_delayed_task_runs_after_its_delay():
+    queue = TaskQueue(workers=1, max_queue=10)
+    ran_at = []
+    submitted = time.monotonic()
+
+    assert queue.submit_later(0.05, 'later', lambda: ran_at.append(time.monotonic()), key='d')
+    assert queue.submit_later(0.05, 'later', lambda: ran_at.append(time.monotonic()), key='d') is False
+    wait_for(lambda: ran_at)
+    assert ran_at[0] - submitted >= 0.05
+
+
+def test_failing_task_is_counted_and_worker_survives():
+    queue = TaskQueue(workers=1, max_queue=10)
+    done = threading.Event()
+
+    queue.submit('work', lambda: 1 / 0)
+    queue.submit('work', done.set)
+    assert done.wait(2)
+    wait_for(lambda: queue.get_stats()['queues']['work']['completed'] == 1)
+    assert queue.get_stats()['queues']['work']['failed'] == 1
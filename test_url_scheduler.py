@@ -0,0 +1,103 @@
+"""
+Tests for the URL scheduler's due-time heap and check settings
+"""
+
+import time
+
+from url_monitor import URLMonitor, MIN_CHECK_INTERVAL
+from url_scheduler import AdaptiveCadence, URLScheduler
+
+
+class FakeMonitor:
+    """Just enough of URLMonitor for the scheduler"""
+
+    def __init__(self):
+        self.scheduler = None
+
+    def get_url(self, url):
+        return {'check_interval': 60, 'timeout': 1, 'jitter': 0}
+
+    def get_monitored_urls(self, user_id=None):
+        return []
+
+
+class FakeStorage:
+    """In-memory catalogue; add_url must not get as far as storing anything"""
+
+    def __init__(self):
+        self.urls = {}
+
+    def get(self, url):
+        return self.urls.get(url)
+
+    def put(self, url, url_data):
+        self.urls[url] = url_data
+
+
+def make_scheduler():
+    return URLScheduler(FakeMonitor(), engine=None)
+
+
+def test_rescheduled_url_is_returned_once_at_its_new_time():
+    scheduler = make_scheduler()
+    scheduler.schedule('https://a.example', 0)
+    scheduler.schedule('https://a.example', 0.05)  # Supersedes the first entry
+
+    started = time.monotonic()
+    assert scheduler._next_due() == 'https://a.example'
+    assert time.monotonic() - started >= 0.05
+    assert scheduler._heap == []  # The stale entry was popped and skipped
+
+
+def test_unscheduled_url_is_skipped():
+    scheduler = make_scheduler()
+    scheduler.schedule('https://gone.example', 0)
+    scheduler.schedule('https://kept.example', 0.02)
+    scheduler.unschedule('https://gone.example')
+
+    assert scheduler._next_due() == 'https://kept.example'
+    assert scheduler.get_stats()['targets'] == 1
+
+
+def test_urls_come_out_in_due_order():
+    scheduler = make_scheduler()
+    for url, delay in (('https://c.example', 0.03), ('https://a.example', 0.01), ('https://b.example', 0.02)):
+        scheduler.schedule(url, delay)
+
+    assert [scheduler._next_due() for _ in range(3)] == ['https://a.example', 'https://b.example', 'https://c.example']
+
+
+def test_unsafe_stored_settings_are_clamped():
+    scheduler = make_scheduler()
+    scheduler.monitor.get_url = lambda url: {'check_interval': -5, 'timeout': -1, 'jitter': 3}
+
+    interval, timeout, jitter = scheduler.get_check_config('https://a.example')
+    assert interval >= MIN_CHECK_INTERVAL
+    assert timeout == scheduler.default_timeout
+    assert 0 <= jitter < 1
+
+
+def test_negative_delay_is_not_scheduled_in_the_past():
+    scheduler = make_scheduler()
+    scheduler.schedule('https://a.example', -5)
+
+    assert scheduler._due['https://a.example'] >= time.monotonic() - 0.01
+
+
+def test_add_url_rejects_unsafe_check_settings():
+    monitor = URLMonitor(storage=FakeStorage())
+    for settings in ({'interval': -5}, {'interval': 0}, {'timeout': 0}, {'jitter': 1}, {'jitter': -0.1}, {'interval': 'soon'}):
+        result = monitor.add_url('https://a.example', user_id='alice', **settings)
+        assert result['success'] is False, settings
+    assert monitor.storage.urls == {}
+
+
+def test_adaptive_backoff_is_capped_in_seconds():
+    cadence = AdaptiveCadence(min_interval=3, max_backoff=10, backoff=2, confirm_count=1, max_interval=30)
+    stable = {'is_online': True, 'response_time': 10}
+
+    intervals = [cadence.next_interval('https://a.example', stable, 6) for _ in range(10)]
+    assert max(intervals) == 30  # Not 6 * 10
+
+    # A base interval above the cap is kept as is, never shortened
+    assert cadence.next_interval('https://b.example', stable, 120) == 120